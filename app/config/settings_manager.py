@@ -7,6 +7,11 @@ class SettingsManager:
         self._settings = {
             "go_live": False,  # New setting
             "multiplier": 1,
+            # Where overlay values go: 'file' (logs/*.txt), 'obs' (SetInputSettings) or 'both'
+            "overlay_output": "file",
+            # OBS text input names for values sent straight to OBS, keyed like
+            # overlay_state.OBS_INPUT_LABELS; values without one stay file-only
+            "obs_inputs": {},
             "alerts": False,
             "broadcastAlert": False,
             "subtitles": True,
@@ -1,8 +1,10 @@
 import os
 import sys
+import json
 import signal
 import threading
 import time
+from datetime import datetime
 from dotenv import load_dotenv
 
 try:
@@ -16,10 +18,20 @@ from app.config.globals import shutdown_event, tiktok_streamer, instagram_stream
 from app.obs.obs_client import ObsClient
 from app.web.server import start_flask_app, stop_flask_app, app
 from app.video_processing.capture import FrameCapturer
+from app.video_processing.frame_sources import create_frame_source
+from app.video_processing.change_detection import RegionChangeDetector
+from app.video_processing.scheduler import RegionScheduler
+from app.video_processing.ocr_executor import OcrExecutor, FATAL_OCR_ERRORS
+from app.video_processing import ocr
+from app.video_processing.regions import RegionRegistry
+from app.video_processing.glyph_recognizer import GlyphRecognizer
+from app.video_processing import account_details, orders, charts
 from app.video_processing.account_details import process_account
 from app.video_processing.orders import process_orders
 from app.video_processing.charts import process_chart
+from app.video_processing.overlay_state import overlay_state
 from app.video_processing.awards import profit_awards
+from app.utils.metrics import stage_seconds, region_events, loop_iterations, latency_report
 from app.config import globals
 from app.services.discord_service import DiscordBot
 
@@ -29,10 +41,64 @@ env_path = os.path.join(base_dir, '.env')
 load_dotenv(env_path)
 
 DISCORD_BOT_TOKEN = os.getenv('DISCORD_BOT_TOKEN')
+# Where broker frames come from: camera:8 (default), video:<file.mp4>, images:<dir> or obs:<source name>
+FRAME_SOURCE = os.getenv('FRAME_SOURCE', 'camera:8')
+# Playback speed for recorded sources (1 = real time, 0 = as fast as possible)
+FRAME_SOURCE_RATE = float(os.getenv('FRAME_SOURCE_RATE', '1'))
+# Shared-memory frame slots the OCR workers crop from: one being captured, one per tick
+# in flight, plus headroom for a slow Tesseract read
+FRAME_RING_SLOTS = 4
+# Seconds to wait after a tick without a frame, doubling up to the maximum while none arrive
+MIN_FRAME_WAIT = 0.05
+MAX_FRAME_WAIT = 1.0
+
+# One line per session with the capture-to-overlay latency percentiles
+latency_log_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs', 'latency_sessions.txt')
+session_started = datetime.now()
 
 obs_client = None
 frame_capturer = None
+ocr_executor = None
 loop_thread = None
+latency_logged = False
+
+# Screen regions, their OCR settings and handlers live in app/config/regions.json
+# and are picked up again whenever that file changes
+region_registry = RegionRegistry(handlers={
+    'account': process_account,
+    'orders': process_orders,
+    'chart': process_chart,
+})
+REGION_RELOAD_INTERVAL = 1.0
+
+# Skips OCR for regions whose pixels haven't changed since they were last read
+change_detector = RegionChangeDetector(threshold=2.0)
+
+# Each region is polled at its own rate, backing off while its text stays the same.
+# Open P/L moves constantly; the chart header changes maybe once per trade.
+region_scheduler = RegionScheduler()
+last_region_text = {}
+
+# Template-matching fast path for regions drawn in a fixed font (see "fast_path" in regions.json)
+glyph_recognizers = {}
+
+def apply_region_changes(names):
+    """Bring the scheduler and per-region caches in line with the registry for the given regions."""
+    for name in names:
+        region = region_registry.get(name)
+        if region is None:
+            region_scheduler.remove_region(name)
+        else:
+            region_scheduler.add_region(name, interval=region.interval, max_interval=region.max_interval)
+        change_detector.reset(name)
+        ocr.ocr_cache.clear(name)
+        # Templates are tied to the crop's scale, so they start over with the region
+        glyph_recognizers.pop(name, None)
+        if region is not None and region.fast_path == 'glyph':
+            glyph_recognizers[name] = GlyphRecognizer()
+        last_region_text.pop(name, None)
+
+apply_region_changes(region_registry.regions())
 
 def handle_shutdown_signal(signum, frame):
     if obs_available and hasattr(obs, 'script_log'):
@@ -40,11 +106,34 @@ def handle_shutdown_signal(signum, frame):
     shutdown_event.set()
     graceful_shutdown()
 
+def log_latency_session():
+    """Append this session's capture-to-overlay latency percentiles to the latency log."""
+    global latency_logged
+    if latency_logged:
+        return
+    latency_logged = True
+
+    entry = {
+        'started': session_started.strftime('%Y-%m-%d %H:%M:%S'),
+        'ended': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'capture_to_overlay': latency_report(),
+        'overlay_updates': overlay_state.get_stats(),
+    }
+    try:
+        os.makedirs(os.path.dirname(latency_log_file), exist_ok=True)
+        with open(latency_log_file, 'a') as f:
+            f.write(json.dumps(entry) + "\n")
+        print(f"Capture-to-overlay latency this session: {entry['capture_to_overlay']}")
+    except Exception as e:
+        print(f"Error writing latency log: {e}")
+
 def graceful_shutdown():
-    global obs_client, frame_capturer
+    global obs_client, frame_capturer, ocr_executor
     if obs_available and hasattr(obs, 'script_log'):
         obs.script_log(obs.LOG_INFO, "Shutting down application gracefully...")
 
+    log_latency_session()
+
     # Stop Flask
     stop_flask_app()
 
@@ -56,6 +145,10 @@ def graceful_shutdown():
     if obs_client:
         obs_client.disconnect()
 
+    # Stop OCR workers before the frame ring they read from goes away
+    if ocr_executor:
+        ocr_executor.shutdown(wait=False)
+
     # Release camera
     if frame_capturer:
         frame_capturer.release()
@@ -66,25 +159,94 @@ def graceful_shutdown():
         obs.script_log(obs.LOG_INFO, "Shutdown complete.")
 
 def loop_function():
+    last_reload_check = time.time()
+    # Back-off between attempts while the source isn't producing frames
+    frame_wait = MIN_FRAME_WAIT
     while not shutdown_event.is_set():
+        # Regions sent to OCR this tick whose result hasn't been handled yet
+        outstanding = set()
         try:
-            cropped_frame = frame_capturer.capture_frame(600, 230, 1100, 1100)
-            if cropped_frame is not None:
-                process_account(cropped_frame)
-
-            cropped_frame = frame_capturer.capture_frame(0, 100, 1920, 190)
-            if cropped_frame is not None:
-                process_orders(cropped_frame)
-
-            cropped_frame = frame_capturer.capture_frame(0, 0, 1400, 100)
-            if cropped_frame is not None:
-                process_chart(cropped_frame)
-
-            profit_awards()
-
-            time.sleep(0.3)
+            if time.time() - last_reload_check >= REGION_RELOAD_INTERVAL:
+                last_reload_check = time.time()
+                apply_region_changes(region_registry.reload_if_changed())
+
+            due = region_scheduler.due_regions()
+            if not due:
+                # Without any regions this idles at the cap until a reload adds some
+                time.sleep(min(region_scheduler.time_until_next(), 0.5))
+                continue
+
+            # One grab per tick so every due region comes from the same frame
+            rects = region_registry.rects(due)
+            with stage_seconds.time(stage='capture', region='frame'):
+                regions = frame_capturer.capture_regions(rects)
+            if regions is None:
+                if frame_capturer.source.exhausted:
+                    # A replay has run out; shut down so its latency session gets logged
+                    print("Frame source has no more frames; shutting down.")
+                    shutdown_event.set()
+                    graceful_shutdown()
+                    break
+                time.sleep(frame_wait)
+                frame_wait = min(frame_wait * 2, MAX_FRAME_WAIT)
+                continue
+            frame_wait = MIN_FRAME_WAIT
+            loop_iterations.inc()
+
+            jobs = {}
+            for name, crop in regions.items():
+                region = region_registry.get(name)
+                if change_detector.should_process(name, crop):
+                    # Preprocessing happens next to the OCR, in the worker processes
+                    jobs[name] = (crop, region.profile, region.ocr_config)
+                    outstanding.add(name)
+                    region_events.inc(region=name, event='processed')
+                else:
+                    region_events.inc(region=name, event='unchanged')
+                    region_scheduler.report(name, changed=False)
+
+            # Regions are OCR'd concurrently and handled as each one finishes; workers crop
+            # the frame straight out of the capturer's shared frame ring.
+            # The OCR stage is the time the loop spends waiting on each result.
+            results = ocr.recognize_regions(
+                jobs, ocr_executor, glyph_recognizers,
+                frame_ref=frame_capturer.current_frame, rects=rects
+            )
+            while True:
+                start = time.perf_counter()
+                name, extracted_text = next(results, (None, None))
+                if name is None:
+                    break
+                stage_seconds.observe(time.perf_counter() - start, stage='ocr', region=name)
+                outstanding.discard(name)
+                if extracted_text is None:
+                    # The read failed; make sure the region is read again next time it's due
+                    change_detector.reset(name)
+                    continue
+
+                handler = region_registry.get(name).handler
+                with stage_seconds.time(stage='handler', region=name):
+                    result = handler(
+                        regions[name], extracted_text=extracted_text, captured_at=frame_capturer.last_frame_time
+                    )
+
+                region_scheduler.report(name, changed=extracted_text != last_region_text.get(name))
+                last_region_text[name] = extracted_text
+
+                if handler is process_orders and result:
+                    # A fill usually means more order lines are about to follow
+                    region_scheduler.boost(name)
+                elif handler is process_account:
+                    profit_awards()
+
+        except FATAL_OCR_ERRORS as e:
+            print(f"Tesseract error: {e}")
+            shutdown_event.set()
         except Exception as e:
             print(f"Error in loop function: {e}")
+            # Their crops were recorded as read, but nothing was handled
+            for name in outstanding:
+                change_detector.reset(name)
             time.sleep(1)  # Wait a bit before retrying
 
 def on_obs_ready():
@@ -103,11 +265,11 @@ def on_obs_ready():
         globals.obs_client.get_version_async(on_version_received)
 
 def on_connection_failed():
-    print("Failed to connect to OBS")
-    graceful_shutdown()
+    # The client keeps retrying; on_obs_ready fires once OBS is up
+    print("Failed to connect to OBS, still trying in the background")
 
 def main():
-    global obs_client, frame_capturer, loop_thread
+    global obs_client, frame_capturer, ocr_executor, loop_thread
 
     try:
         # These are already imported from globals, but we can rely on them if needed
@@ -116,15 +278,29 @@ def main():
         signal.signal(signal.SIGINT, handle_shutdown_signal)
         signal.signal(signal.SIGTERM, handle_shutdown_signal)
 
-        frame_capturer = FrameCapturer(camera_index=8, width=1920, height=1080)
+        ocr_executor = OcrExecutor()
+
+        # Overlay files are created (and their current values loaded) once, not per frame
+        account_details.ensure_files_exist()
+        orders.ensure_files_exist()
+        charts.ensure_files_exist()
 
         print("Initializing OBS client...")
         obs_client = ObsClient()
         globals.obs_client = obs_client
         obs_client.on_ready_callback = on_obs_ready
         obs_client.on_connection_failed_callback = on_connection_failed
+        obs_client.async_client.connection_callbacks.append(overlay_state.on_obs_connection)
         obs_client.start_connection()
 
+        # Live sources are drained on a background thread; an unpaced recording is
+        # read synchronously so every frame gets processed
+        frame_source = create_frame_source(FRAME_SOURCE, obs_client=obs_client, rate=FRAME_SOURCE_RATE)
+        frame_capturer = FrameCapturer(
+            width=1920, height=1080, background=frame_source.live, source=frame_source,
+            shared_slots=FRAME_RING_SLOTS
+        )
+
         print("Waiting for OBS to become ready...")
         # Wait until OBS is ready before starting Flask & Discord
         obs_ready.wait(timeout=30)  # Adjust timeout as needed
@@ -0,0 +1,579 @@
+# app/obs/async_obs_client.py
+import asyncio
+import json
+import random
+import uuid
+from collections import deque, OrderedDict
+import websockets
+from app.utils.metrics import registry
+
+# Requests that leave OBS in the same state however often (and however late) they are
+# sent; only these are held while reconnecting and replayed afterwards
+IDEMPOTENT_REQUESTS = ('SetInputSettings',)
+
+obs_reconnects = registry.counter(
+    'obs_reconnects_total', "OBS websocket reconnect attempts", ('result',)
+)
+# queue is 'outbound' (waiting for the in-flight window) or 'replay' (waiting for a reconnect)
+obs_queue_depth = registry.gauge(
+    'obs_queue_depth', "OBS requests queued but not yet sent", ('queue',)
+)
+obs_coalesced = registry.counter(
+    'obs_requests_coalesced_total', "Queued OBS requests replaced by a newer one for the same setting", ('queue',)
+)
+
+
+def replay_key(request_type, request_data):
+    """
+    What an idempotent request overwrites, e.g. ('SetInputSettings', 'Profit Overlay', ('color',));
+    a newer request with the same key makes an unsent older one pointless. None if the request
+    isn't idempotent.
+    """
+    request_data = request_data or {}
+    if request_type not in IDEMPOTENT_REQUESTS or 'inputName' not in request_data:
+        return None
+    return request_type, request_data['inputName'], tuple(sorted(request_data.get('inputSettings', {})))
+
+
+def backoff_delay(attempt, base=0.5, cap=30.0):
+    """Exponential backoff with jitter: somewhere in the upper half of min(cap, base * 2**attempt)."""
+    # Clamp the exponent so hours of failed attempts don't overflow the float conversion
+    delay = min(cap, base * (2 ** min(attempt, 16)))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def request_result(response):
+    """Response data of an op 7 response or batch result (True if there is none), or None if it failed."""
+    if not response or not response.get('requestStatus', {}).get('result', False):
+        return None
+    return response.get('responseData') or True
+
+
+def request_status(response):
+    """The requestStatus OBS answered with ({'result', 'code', 'comment'}), or None without an answer."""
+    return (response or {}).get('requestStatus')
+
+
+def _with_status(callback, on_error):
+    """
+    A queued item's callback, called with (result, status): `callback(result)` as before,
+    preceded by `on_error(status)` when the request (or any request of a batch) failed.
+    """
+    def finish(result, status=None):
+        if on_error and (result is None or (isinstance(result, list) and None in result)):
+            on_error(status)
+        if callback:
+            callback(result)
+    return finish
+
+
+class AsyncObsClient:
+    """
+    obs-websocket v5 client on an asyncio event loop.
+
+    Everything runs on the loop that calls `connect`: one reader task matches responses
+    to awaiting requests by id and fans events out, and one sender task pipelines queued
+    requests (`enqueue`) with up to `max_in_flight` awaiting a response at once.
+
+        client = AsyncObsClient()
+        if await client.connect():
+            status = await client.request("GetRecordStatus")
+            async for event in client.events():
+                print(event['eventType'])
+
+    A queued idempotent request that hasn't been sent yet is replaced in place by a newer
+    one for the same input and setting keys (see `replay_key`), so a slow OBS only ever
+    gets the latest value; the replaced request's callback gets the newer one's result.
+
+    After `connect`, a connection that failed or dropped (e.g. OBS not started yet, or
+    restarting) is re-established in the background with jittered exponential backoff
+    until `close`. While it is down, queued idempotent requests (see IDEMPOTENT_REQUESTS)
+    wait in a bounded replay buffer, keeping only the latest value per input and setting,
+    and are sent first after identifying; anything else fails right away as before.
+
+    Methods other than the coroutines are not thread-safe; from another thread go through
+    the loop (ObsClient does this for the rest of the app).
+    """
+
+    def __init__(self, host="ws://localhost:4455", event_subscriptions=33, max_in_flight=16,
+                 max_buffered=256, reconnect_delay=0.5, max_reconnect_delay=30.0):
+        """
+        :param event_subscriptions: obs-websocket EventSubscription bitmask sent in Identify.
+        :param max_in_flight: How many queued requests may await their response at once.
+        :param max_buffered: Most requests held for replay while reconnecting; the oldest are dropped.
+        :param reconnect_delay: First reconnect backoff in seconds, doubled per failed attempt...
+        :param max_reconnect_delay: ...up to this.
+        """
+        self.host = host
+        self.event_subscriptions = event_subscriptions
+        self.max_in_flight = max_in_flight
+        self.ws = None
+        self.connected = False
+        self.debug = False
+        # request id -> asyncio.Future for the raw op 7 / op 9 payload
+        self.pending = {}
+        # Plain callables run on the loop for every event (op 5 'd' payload)
+        self.event_callbacks = []
+        self._subscribers = set()
+        # Queued requests, each in a one-item list so it can be replaced in place:
+        # ('request', type, data, callback) or ('batch', requests, execution_type, halt, callback)
+        self._outbound = deque()
+        # replay_key -> its slot in _outbound
+        self._queued = {}
+        self._outbound_ready = asyncio.Event()
+        self._window = asyncio.Semaphore(max_in_flight)
+        self._reader_task = None
+        self._sender_task = None
+        # replay_key -> queued item, oldest first
+        self._replay = OrderedDict()
+        self.max_buffered = max_buffered
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        # Set by connect(); cleared by close() to stop reconnecting
+        self._supervising = False
+        self._reconnect_task = None
+        # Plain callables run on the loop with True on every (re)connect and False on a drop
+        self.connection_callbacks = []
+
+    def log(self, message):
+        if self.debug:
+            print(f"OBS Client: {message}")
+
+    async def connect(self, retry_attempts=3, retry_delay=2):
+        """
+        Open the websocket and go through Hello / Identify / Identified.
+
+        If that fails `retry_attempts` times, the client keeps trying in the background
+        with the same backoff as after a dropped connection, until `close`; connection
+        callbacks get True once it gets through.
+
+        :return: True once identified, False after `retry_attempts` failed attempts.
+        """
+        self._supervising = True
+        for attempt in range(retry_attempts):
+            try:
+                await self._open()
+                self._connected()
+                return True
+            except Exception as e:
+                self.log(f"Connection error: {e}")
+                await self._close_socket()
+                if attempt + 1 < retry_attempts:
+                    await asyncio.sleep(retry_delay)  # Backoff before retrying
+            if not self._supervising:
+                # Closed meanwhile
+                return False
+        self._reconnect_task = asyncio.create_task(self._reconnect())
+        return False
+
+    async def _open(self):
+        # Screenshots come back as base64 PNGs well over the default 1 MiB message cap
+        ws = await websockets.connect(self.host, open_timeout=10, max_size=None)
+        self.ws = ws
+        hello = json.loads(await asyncio.wait_for(ws.recv(), timeout=10))
+        if hello.get('op') != 0:  # Hello
+            raise ConnectionError(f"Expected Hello, got op {hello.get('op')}")
+
+        await ws.send(json.dumps({
+            "op": 1,
+            "d": {
+                "rpcVersion": 1,
+                "eventSubscriptions": self.event_subscriptions
+            }
+        }))
+        identified = json.loads(await asyncio.wait_for(ws.recv(), timeout=10))
+        if identified.get('op') != 2:  # Identified
+            raise ConnectionError(f"Expected Identified, got op {identified.get('op')}")
+
+        self.connected = True
+        self._reader_task = asyncio.create_task(self._read(ws))
+
+    async def reidentify(self, event_subscriptions):
+        """
+        Change the event subscription mask; sent as op 3 Reidentify if connected, and
+        used for every later Identify either way.
+        """
+        self.event_subscriptions = event_subscriptions
+        if not self.connected:
+            return
+        try:
+            await self.ws.send(json.dumps({"op": 3, "d": {"eventSubscriptions": event_subscriptions}}))
+        except websockets.ConnectionClosed as e:
+            # The reconnect identifies with the new mask
+            self.log(f"Reidentify failed: {e}")
+
+    async def _close_socket(self):
+        ws, self.ws = self.ws, None
+        self.connected = False
+        if ws is not None:
+            try:
+                await ws.close()
+            except Exception as e:
+                self.log(f"Disconnect error: {e}")
+
+    async def _read(self, ws):
+        """Resolve pending requests and dispatch events until the socket closes."""
+        try:
+            async for message in ws:
+                try:
+                    data = json.loads(message)
+                except json.JSONDecodeError:
+                    continue
+
+                op = data.get('op')
+                if op == 5:  # Event
+                    self._dispatch_event(data.get('d', {}))
+                elif op in (7, 9):  # Request Response / Request Batch Response
+                    self._resolve_pending(data.get('d', {}))
+        except websockets.ConnectionClosed:
+            self.log("WebSocket connection closed")
+        except Exception as e:
+            self.log(f"Listener error: {e}")
+        finally:
+            dropped = self.ws is ws
+            if dropped:
+                self.ws = None
+                self.connected = False
+            self._fail_pending(ConnectionError("OBS connection closed"))
+            if dropped and self._supervising:
+                self._notify_connection(False)
+                self._hold_outbound()
+                self._reconnect_task = asyncio.create_task(self._reconnect())
+
+    async def _reconnect(self):
+        """Retry until re-identified (or closed), then replay what was held meanwhile."""
+        attempt = 0
+        while self._supervising:
+            delay = backoff_delay(attempt, self.reconnect_delay, self.max_reconnect_delay)
+            self.log(f"Reconnecting in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            if not self._supervising:
+                return
+            try:
+                await self._open()
+            except Exception as e:
+                self.log(f"Reconnect failed: {e}")
+                obs_reconnects.inc(result='failed')
+                await self._close_socket()
+                attempt += 1
+                continue
+            obs_reconnects.inc(result='connected')
+            self.log(f"Reconnected, replaying {len(self._replay)} requests")
+            self._connected()
+            return
+
+    def _connected(self):
+        """Identified: send what was held while disconnected first, then tell the callbacks."""
+        held = list(self._replay.values())
+        self._replay.clear()
+        for item in held:
+            self._push(item)
+        self._update_depth()
+        self._notify_connection(True)
+
+    def _notify_connection(self, connected):
+        for callback in list(self.connection_callbacks):
+            try:
+                callback(connected)
+            except Exception as e:
+                self.log(f"Connection callback error: {e}")
+
+    def _resolve_pending(self, d):
+        future = self.pending.pop(d.get('requestId'), None)
+        if future is None:
+            # Timed out or cancelled already; nothing is waiting for it
+            self.log(f"Dropping orphaned response {d.get('requestId')}")
+        elif not future.done():
+            future.set_result(d)
+
+    def _fail_pending(self, error):
+        futures = list(self.pending.values())
+        self.pending.clear()
+        for future in futures:
+            if not future.done():
+                future.set_exception(error)
+
+    def _dispatch_event(self, event):
+        for queue in list(self._subscribers):
+            if queue.full():
+                # A subscriber that fell behind loses its oldest event, not the newest
+                queue.get_nowait()
+            queue.put_nowait(event)
+        for callback in list(self.event_callbacks):
+            try:
+                callback(event)
+            except Exception as e:
+                self.log(f"Event callback error: {e}")
+
+    async def events(self, maxsize=256):
+        """
+        Iterate over OBS events (op 5 'd' payloads: eventType, eventIntent, eventData)
+        received from now on; the subscription ends when the iteration stops.
+        """
+        queue = asyncio.Queue(maxsize)
+        self._subscribers.add(queue)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._subscribers.discard(queue)
+
+    async def _call(self, message, timeout):
+        """Send an op 6 / op 8 message under a fresh request id and await the raw response."""
+        if not self.connected:
+            raise ConnectionError("OBS is not connected")
+        request_id = uuid.uuid4().hex
+        message['d']['requestId'] = request_id
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+        try:
+            await self.ws.send(json.dumps(message))
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError("No response from OBS")
+        except websockets.ConnectionClosed as e:
+            raise ConnectionError(f"OBS connection closed: {e}")
+        finally:
+            self.pending.pop(request_id, None)
+
+    async def request(self, request_type, request_data=None, timeout=5):
+        """
+        Send a request and await its response data (True if there is none), or None if OBS
+        reports a failure.
+
+        :raises TimeoutError: If OBS doesn't answer within `timeout` seconds.
+        :raises ConnectionError: If OBS isn't connected or the connection drops first.
+        """
+        return request_result(await self._request_response(request_type, request_data, timeout))
+
+    async def _request_response(self, request_type, request_data=None, timeout=5):
+        return await self._call({
+            "op": 6,
+            "d": {
+                "requestType": request_type,
+                "requestData": request_data or {}
+            }
+        }, timeout)
+
+    async def request_batch(self, requests, execution_type=0, halt_on_failure=False, timeout=5):
+        """
+        Send (request_type, request_data) pairs as one op 8 RequestBatch.
+
+        :return: Per-request results (response data, True, or None on failure) in request order.
+        """
+        responses = await self._batch_responses(requests, execution_type, halt_on_failure, timeout)
+        return [request_result(response) for response in responses]
+
+    async def _batch_responses(self, requests, execution_type=0, halt_on_failure=False, timeout=5):
+        """Raw per-request results of a RequestBatch in request order; None where OBS sent none."""
+        if not requests:
+            return []
+        response = await self._call({
+            "op": 8,
+            "d": {
+                "haltOnFailure": halt_on_failure,
+                "executionType": execution_type,
+                "requests": [
+                    {"requestType": request_type, "requestId": str(index), "requestData": request_data or {}}
+                    for index, (request_type, request_data) in enumerate(requests)
+                ]
+            }
+        }, timeout)
+
+        responses = [None] * len(requests)
+        for result in response.get('results', []):
+            try:
+                index = int(result.get('requestId'))
+            except (TypeError, ValueError):
+                continue
+            if 0 <= index < len(responses):
+                responses[index] = result
+        return responses
+
+    def enqueue(self, request_type, request_data=None, callback=None, on_error=None):
+        """
+        Queue a request for the sender task; `callback` gets its result, or None if it failed.
+
+        :param on_error: Called before `callback` when the request failed, with the
+                         requestStatus OBS refused it with, or None if OBS never answered
+                         (timed out, connection lost, dropped from the replay buffer).
+        """
+        self._queue(('request', request_type, request_data, _with_status(callback, on_error)))
+
+    def enqueue_batch(self, requests, execution_type=0, halt_on_failure=False, callback=None, on_error=None):
+        """
+        Queue a batch for the sender task; `callback` gets the list of results (all None if it failed).
+
+        :param on_error: Called before `callback` if any request failed, with the list of
+                         per-request statuses as for `enqueue` (None where OBS didn't answer).
+        """
+        self._queue(('batch', requests, execution_type, halt_on_failure, _with_status(callback, on_error)))
+
+    def _queue(self, item):
+        if not self.connected:
+            self._hold(item)
+        else:
+            self._push(item)
+
+    def _push(self, item):
+        """Append to the outbound queue, or replace a queued request for the same setting."""
+        key = self._item_key(item)
+        slot = self._queued.get(key) if key is not None else None
+        if slot is not None:
+            slot[0] = self._chain(item, slot[0])
+            obs_coalesced.inc(queue='outbound')
+        else:
+            slot = [item]
+            self._outbound.append(slot)
+            if key is not None:
+                self._queued[key] = slot
+        self._update_depth()
+        self._wake_sender()
+
+    def _pop(self):
+        slot = self._outbound.popleft()
+        key = self._item_key(slot[0])
+        if key is not None and self._queued.get(key) is slot:
+            del self._queued[key]
+        self._update_depth()
+        return slot[0]
+
+    def _chain(self, item, superseded):
+        """`item` with a callback that also answers the older `superseded` request's callback."""
+        first, second = superseded[-1], item[-1]
+        if not first:
+            return item
+
+        def callback(result, status=None):
+            for each in (first, second):
+                if each:
+                    try:
+                        each(result, status)
+                    except Exception as e:
+                        self.log(f"Callback error: {e}")
+        return item[:-1] + (callback,)
+
+    def _update_depth(self):
+        obs_queue_depth.set(len(self._outbound), queue='outbound')
+        obs_queue_depth.set(len(self._replay), queue='replay')
+
+    @staticmethod
+    def _item_key(item):
+        """replay_key of a queued request, or of a batch made only of idempotent requests."""
+        if item[0] == 'request':
+            return replay_key(item[1], item[2])
+        keys = tuple(replay_key(request_type, request_data) for request_type, request_data in item[1])
+        return keys if keys and None not in keys else None
+
+    def _hold(self, item):
+        """Keep an idempotent request for replay after reconnecting; fail anything else."""
+        key = self._item_key(item)
+        if key is None or not self._supervising:
+            self._finish(item, None)
+            return
+        superseded = self._replay.pop(key, None)
+        if superseded is not None:
+            item = self._chain(item, superseded)
+            obs_coalesced.inc(queue='replay')
+        self._replay[key] = item
+        while len(self._replay) > self.max_buffered:
+            _, dropped = self._replay.popitem(last=False)
+            self._finish(dropped, None)
+        self._update_depth()
+
+    def _hold_outbound(self):
+        while self._outbound:
+            self._hold(self._pop())
+
+    def _finish(self, item, result, status=None):
+        """Call a queued item's callback; a None result fails every request of a batch."""
+        callback = item[-1]
+        if item[0] == 'batch' and result is None:
+            result = [None] * len(item[1])
+            status = [None] * len(item[1])
+        if callback:
+            try:
+                callback(result, status)
+            except Exception as e:
+                self.log(f"Callback error: {e}")
+
+    def _wake_sender(self):
+        if self._sender_task is None or self._sender_task.done():
+            self._sender_task = asyncio.get_running_loop().create_task(self._send_queued())
+        self._outbound_ready.set()
+
+    async def _send_queued(self):
+        """
+        Send queued requests without waiting for each response: up to `max_in_flight` are
+        outstanding at once, and each callback runs as its response arrives (in whatever
+        order OBS answers), so one slow request doesn't hold up the rest.
+        """
+        while True:
+            while not self._outbound:
+                self._outbound_ready.clear()
+                await self._outbound_ready.wait()
+            await self._window.acquire()
+            if not self._outbound:
+                self._window.release()
+                continue
+            asyncio.create_task(self._send_one(self._pop()))
+
+    async def _send_one(self, item):
+        try:
+            if item[0] == 'batch':
+                responses = await self._batch_responses(*item[1:4])
+                result = [request_result(response) for response in responses]
+                status = [request_status(response) for response in responses]
+            else:
+                response = await self._request_response(item[1], item[2])
+                result, status = request_result(response), request_status(response)
+        except ConnectionError as e:
+            self.log(f"Request failed, connection lost: {e}")
+            # Sent but never answered; idempotent requests go out again after reconnecting,
+            # unless a newer value for the same setting is already waiting to
+            key = self._item_key(item)
+            if key is not None and key in self._replay:
+                self._replay[key] = self._chain(self._replay[key], item)
+            elif key is not None and key in self._queued:
+                self._queued[key][0] = self._chain(self._queued[key][0], item)
+            elif key is not None and self._supervising:
+                self._queue(item)
+            else:
+                self._finish(item, None)
+            return
+        except Exception as e:
+            self.log(f"Request failed: {e}")
+            result = status = None
+        finally:
+            self._window.release()
+        self._finish(item, result, status)
+
+    @property
+    def in_flight(self):
+        """Number of requests (queued or direct) currently awaiting a response."""
+        return len(self.pending)
+
+    async def close(self):
+        """Close the connection, stop reconnecting and the sender, and fail anything still waiting."""
+        self._supervising = False
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+        if self._sender_task is not None:
+            self._sender_task.cancel()
+            self._sender_task = None
+        await self._close_socket()
+        if self._reader_task is not None:
+            try:
+                await self._reader_task
+            except Exception:
+                pass
+            self._reader_task = None
+        self._fail_pending(ConnectionError("OBS connection closed"))
+        held = list(self._replay.values()) + [slot[0] for slot in self._outbound]
+        self._replay.clear()
+        self._outbound.clear()
+        self._queued.clear()
+        self._update_depth()
+        for item in held:
+            self._finish(item, None)
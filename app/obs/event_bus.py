@@ -0,0 +1,161 @@
+# app/obs/event_bus.py
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from app.utils.metrics import registry
+
+
+class EventSubscription:
+    """obs-websocket EventSubscription bits, sent in Identify / Reidentify."""
+    NONE = 0
+    GENERAL = 1 << 0
+    CONFIG = 1 << 1
+    SCENES = 1 << 2
+    INPUTS = 1 << 3
+    TRANSITIONS = 1 << 4
+    FILTERS = 1 << 5
+    OUTPUTS = 1 << 6
+    SCENE_ITEMS = 1 << 7
+    MEDIA_INPUTS = 1 << 8
+    VENDORS = 1 << 9
+    UI = 1 << 10
+
+
+# Event type -> the subscription bit OBS needs before it sends that event
+EVENT_SUBSCRIPTIONS = {
+    "ExitStarted": EventSubscription.GENERAL,
+    "CustomEvent": EventSubscription.GENERAL,
+    "VendorEvent": EventSubscription.VENDORS,
+    "CurrentSceneCollectionChanged": EventSubscription.CONFIG,
+    "CurrentProfileChanged": EventSubscription.CONFIG,
+    "CurrentProgramSceneChanged": EventSubscription.SCENES,
+    "CurrentPreviewSceneChanged": EventSubscription.SCENES,
+    "SceneListChanged": EventSubscription.SCENES,
+    "InputSettingsChanged": EventSubscription.INPUTS,
+    "InputMuteStateChanged": EventSubscription.INPUTS,
+    "CurrentSceneTransitionChanged": EventSubscription.TRANSITIONS,
+    "SourceFilterEnableStateChanged": EventSubscription.FILTERS,
+    "StreamStateChanged": EventSubscription.OUTPUTS,
+    "RecordStateChanged": EventSubscription.OUTPUTS,
+    "ReplayBufferStateChanged": EventSubscription.OUTPUTS,
+    "ReplayBufferSaved": EventSubscription.OUTPUTS,
+    "VirtualcamStateChanged": EventSubscription.OUTPUTS,
+    "SceneItemEnableStateChanged": EventSubscription.SCENE_ITEMS,
+    "MediaInputPlaybackEnded": EventSubscription.MEDIA_INPUTS,
+    "StudioModeStateChanged": EventSubscription.UI,
+}
+
+obs_events = registry.counter(
+    'obs_events_total', "OBS events received, by type and whether handlers ran", ('event_type', 'result')
+)
+
+
+class ObsEvent:
+    """One op 5 event: `type` (e.g. "RecordStateChanged"), `data` (eventData) and `intent`."""
+
+    def __init__(self, event_type, data=None, intent=None):
+        self.type = event_type
+        self.data = data or {}
+        self.intent = intent
+
+    @classmethod
+    def from_message(cls, d):
+        return cls(d.get('eventType'), d.get('eventData'), d.get('eventIntent'))
+
+    def __repr__(self):
+        return f"ObsEvent({self.type!r}, {self.data!r})"
+
+
+class EventBus:
+    """
+    Routes OBS events to handlers registered per event type.
+
+    The subscription mask the client identifies with is the union of the bits the
+    registered event types need, so OBS only sends what somebody listens to;
+    `on_mask_changed(mask)` fires whenever registering or removing a handler changes it.
+    Handlers run on a worker thread, never on the thread reading the websocket, and with
+    the default single worker they see events in the order OBS sent them; if `max_pending`
+    events are already waiting for a handler, further ones are dropped.
+
+        obs_client.events.subscribe("RecordStateChanged", lambda event: print(event.data['outputState']))
+    """
+
+    def __init__(self, max_workers=1, max_pending=256, on_mask_changed=None):
+        self.max_pending = max_pending
+        self.on_mask_changed = on_mask_changed
+        self._lock = threading.Lock()
+        self._handlers = {}
+        self._pending = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ObsEvents")
+
+    @property
+    def mask(self):
+        with self._lock:
+            return self._mask()
+
+    def _mask(self):
+        mask = EventSubscription.NONE
+        for event_type, handlers in self._handlers.items():
+            if handlers:
+                mask |= EVENT_SUBSCRIPTIONS[event_type]
+        return mask
+
+    def subscribe(self, event_type, handler):
+        """
+        Call `handler(ObsEvent)` for every `event_type` event.
+
+        :raises ValueError: If the event type isn't in EVENT_SUBSCRIPTIONS.
+        """
+        if event_type not in EVENT_SUBSCRIPTIONS:
+            raise ValueError(f"Unknown OBS event type '{event_type}'")
+        with self._lock:
+            before = self._mask()
+            self._handlers.setdefault(event_type, []).append(handler)
+            after = self._mask()
+        self._mask_changed(before, after)
+        return handler
+
+    def unsubscribe(self, event_type, handler):
+        with self._lock:
+            before = self._mask()
+            handlers = self._handlers.get(event_type, [])
+            if handler in handlers:
+                handlers.remove(handler)
+            after = self._mask()
+        self._mask_changed(before, after)
+
+    def _mask_changed(self, before, after):
+        if before != after and self.on_mask_changed:
+            self.on_mask_changed(after)
+
+    def dispatch(self, d):
+        """Hand an op 5 'd' payload to its handlers; called on the websocket reader's thread."""
+        event = ObsEvent.from_message(d)
+        with self._lock:
+            handlers = list(self._handlers.get(event.type, ()))
+            if not handlers:
+                return
+            if self._pending >= self.max_pending:
+                obs_events.inc(event_type=event.type, result='dropped')
+                return
+            self._pending += 1
+        obs_events.inc(event_type=event.type, result='dispatched')
+        try:
+            self._executor.submit(self._run, event, handlers)
+        except RuntimeError:
+            # Shut down already
+            with self._lock:
+                self._pending -= 1
+
+    def _run(self, event, handlers):
+        try:
+            for handler in handlers:
+                try:
+                    handler(event)
+                except Exception as e:
+                    print(f"OBS event handler error ({event.type}): {e}")
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
@@ -1,222 +1,280 @@
 # app/obs/obs_client.py
-import json
+import asyncio
 import threading
-import time
-import queue
-from websocket import create_connection, WebSocketTimeoutException, WebSocketConnectionClosedException
-from app.config.globals import shutdown_event
+from concurrent.futures import Future, ThreadPoolExecutor
+from app.obs.async_obs_client import AsyncObsClient
+from app.obs.event_bus import EventBus
+from app.obs.state_cache import ObsStateCache
+
+class RequestBatch:
+    """
+    Several requests sent to OBS as one op 8 RequestBatch, answered by one op 9 response.
+
+    Build it with `ObsClient.batch()`; `send_request` has the same signature as
+    ObsClient.send_request, so code that takes an obs_client can be handed a batch.
+    The batch is queued when the `with` block exits, and `future` resolves to the list
+    of per-request results (response data, True, or None on failure) in request order.
+
+        with obs_client.batch(execution_type=RequestBatch.PARALLEL) as batch:
+            batch.send_request("SetInputSettings", {...})
+            batch.send_request("SetInputSettings", {...})
+        results = batch.future.result(timeout=5)
+    """
+    # obs-websocket RequestBatchExecutionType
+    SERIAL_REALTIME = 0
+    SERIAL_FRAME = 1
+    PARALLEL = 2
+
+    def __init__(self, client, execution_type=SERIAL_REALTIME, halt_on_failure=False):
+        if execution_type not in (self.SERIAL_REALTIME, self.SERIAL_FRAME, self.PARALLEL):
+            raise ValueError(f"Unknown batch execution type {execution_type}")
+        self.client = client
+        self.execution_type = execution_type
+        self.halt_on_failure = halt_on_failure
+        self.requests = []
+        self.future = Future()
+        # Mirrors ObsClient.connected so callers that check it work with a batch too
+        self.connected = client.connected
+
+    def send_request(self, request_type, request_data=None, callback=None, on_error=None):
+        """
+        Add a request to the batch; `callback` gets its own result once the batch is answered,
+        and `on_error` its requestStatus first if it failed (see AsyncObsClient.enqueue).
+        """
+        self.requests.append((request_type, request_data or {}, callback, on_error))
+
+    def resolve(self, results, statuses=None):
+        """Hand out per-request results (None if the batch failed) to the callbacks and future."""
+        results = list(results or [None] * len(self.requests))
+        statuses = list(statuses or [None] * len(self.requests))
+        for (_, _, callback, on_error), result, status in zip(self.requests, results, statuses):
+            if on_error and result is None:
+                try:
+                    on_error(status)
+                except Exception as e:
+                    self.client.log(f"Callback error: {e}")
+            if callback:
+                try:
+                    callback(result)
+                except Exception as e:
+                    self.client.log(f"Callback error: {e}")
+        if not self.future.done():
+            self.future.set_result(results)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None or not self.requests:
+            # Nothing to send (or the block failed): settle the future so nobody waits on it
+            self.future.set_result([])
+            return False
+        self.client.send_batch(self)
+        return False
+
 
 class ObsClient:
-    def __init__(self):
-        self.ws = None
-        self.host = "ws://localhost:4455"
-        self.listener_thread = None
-        self.connection_thread = None
-        self.request_thread = None
-        self.lock = threading.Lock()
-        self.connected = False
+    """
+    Thread-safe, blocking-friendly facade over AsyncObsClient.
+
+    The async client runs on a private event loop in one background thread; calls from
+    the rest of the app are handed to that loop, and send_request callbacks run on a
+    separate callback thread so they may block on the client themselves.
+
+    `ready` is set once the client has identified and cleared while it is reconnecting
+    to a restarted OBS. Register event handlers on `events` (an EventBus); the client
+    only subscribes to the event categories somebody handles. `state` caches recording
+    and streaming status from those events.
+    """
+
+    def __init__(self, host="ws://localhost:4455", max_in_flight=16):
+        """
+        :param max_in_flight: How many queued requests may await their response at once;
+                              they are pipelined over the one websocket and matched by id.
+        """
+        self.host = host
+        self.max_in_flight = max_in_flight
         self.ready = threading.Event()
-        self.debug = False
-        self.responses = {}
-        self.request_queue = queue.Queue()
         self.on_ready_callback = None
         self.on_connection_failed_callback = None
         self.retry_attempts = 3
-        self.current_retry = 0
-        
-        # Start request processing thread
-        self.request_thread = threading.Thread(target=self._process_requests, daemon=True)
-        self.request_thread.start()
 
-    def log(self, message):
-        if self.debug:
-            print(f"OBS Client: {message}")
-
-    def start_connection(self):
-        """Initialize connection in separate thread"""
-        self.connection_thread = threading.Thread(target=self._connect_async, daemon=True)
-        self.connection_thread.start()
+        self.events = EventBus(on_mask_changed=self._on_subscriptions_changed)
+        self.async_client = AsyncObsClient(host, event_subscriptions=self.events.mask, max_in_flight=max_in_flight)
+        self.async_client.event_callbacks.append(self.events.dispatch)
+        self.async_client.connection_callbacks.append(self._on_connection)
+        self._was_ready = False
+        self._closing = False
+        self.loop = asyncio.new_event_loop()
+        self.loop_thread = threading.Thread(target=self._run_loop, name="ObsClientLoop", daemon=True)
+        self.loop_thread.start()
+        self._callbacks = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ObsCallbacks")
+        self.state = ObsStateCache(self)
+        self.state.attach()
 
-    def _connect_async(self):
-        """Attempt to establish connection to OBS WebSocket"""
-        while self.current_retry < self.retry_attempts:
-            try:
-                self.ws = create_connection(self.host, timeout=10)
-                hello_message = json.loads(self.ws.recv())
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_forever()
+        finally:
+            # Stopped by disconnect()
+            self.loop.close()
 
-                if hello_message.get('op') == 0:  # Hello
-                    identify_message = {
-                        "op": 1,
-                        "d": {
-                            "rpcVersion": 1,
-                            "eventSubscriptions": 33
-                        }
-                    }
-                    self.ws.send(json.dumps(identify_message))
+    @property
+    def connected(self):
+        return self.async_client.connected
 
-                    identified_response = json.loads(self.ws.recv())
+    @property
+    def debug(self):
+        return self.async_client.debug
 
-                    if identified_response.get('op') == 2:  # Identified
-                        self.connected = True
-                        self.start_listener_thread()
-                        return
+    @debug.setter
+    def debug(self, value):
+        self.async_client.debug = value
 
-                self._handle_connection_failure()
+    @property
+    def pending(self):
+        return self.async_client.pending
 
-            except Exception as e:
-                self.log(f"Connection error: {e}")
-                if self.ws:
-                    try:
-                        self.ws.close()
-                    except:
-                        pass
-                    self.ws = None
-                self.current_retry += 1
-                time.sleep(2)  # Backoff before retrying
-
-        if self.on_connection_failed_callback:
-            self.on_connection_failed_callback()
-
-    def _handle_connection_failure(self):
-        """Handle failed connection attempts"""
-        self.current_retry += 1
-        if self.ws:
-            try:
-                self.ws.close()
-            except:
-                pass
-            self.ws = None
-        time.sleep(2)  # Backoff before retrying
-
-    def start_listener_thread(self):
-        """Start the WebSocket listener thread if not already running"""
-        if self.listener_thread and self.listener_thread.is_alive():
-            return
-        
-        self.listener_thread = threading.Thread(target=self.listen, daemon=True)
-        self.listener_thread.start()
+    @property
+    def in_flight(self):
+        """Number of requests (queued or direct) currently awaiting a response."""
+        return self.async_client.in_flight
 
-    def listen(self):
-        """Listen for WebSocket messages"""
-        while not shutdown_event.is_set() and self.ws and self.connected:
-            try:
-                message = self.ws.recv()
-                if not message:
-                    continue
-                
-                try:
-                    data = json.loads(message)
-                except json.JSONDecodeError:
-                    continue
-
-                op = data.get('op')
-                if op == 5:  # Event
-                    if not self.ready.is_set():
-                        self.ready.set()
-                        if self.on_ready_callback:
-                            try:
-                                self.on_ready_callback()
-                            except Exception as e:
-                                self.log(f"Ready callback error: {e}")
-
-                elif op == 7:  # Request Response
-                    d = data.get('d', {})
-                    request_id = d.get('requestId')
-                    if request_id:
-                        with self.lock:
-                            self.responses[request_id] = d
-
-            except WebSocketConnectionClosedException:
-                self.log("WebSocket connection closed")
-                self.connected = False
-                break
-            except WebSocketTimeoutException:
-                continue
-            except Exception as e:
-                self.log(f"Listener error: {e}")
-                self.connected = False
-                break
+    def log(self, message):
+        self.async_client.log(message)
 
-        self.log("Listener thread exiting")
+    def start_connection(self):
+        """
+        Connect in the background; on_ready_callback fires once identified. If the first
+        `retry_attempts` fail, on_connection_failed_callback fires and the client keeps
+        trying until `disconnect`.
+        """
+        asyncio.run_coroutine_threadsafe(self._connect(), self.loop)
 
-    def _process_requests(self):
-        """Process OBS requests asynchronously"""
-        while not shutdown_event.is_set():
-            try:
-                # Get request from queue with timeout to allow checking shutdown
-                request = self.request_queue.get(timeout=0.5)
-                if request:
-                    request_type, request_data, callback = request
-                    response = self._send_request_internal(request_type, request_data)
-                    if callback:
-                        try:
-                            callback(response)
-                        except Exception as e:
-                            self.log(f"Callback error: {e}")
-            except queue.Empty:
-                continue
-            except Exception as e:
-                self.log(f"Request processing error: {e}")
+    async def _connect(self):
+        if not await self.async_client.connect(self.retry_attempts):
+            self._call_soon(self.on_connection_failed_callback)
 
-    def send_request(self, request_type, request_data=None, callback=None):
-        """Queue request for async processing"""
-        self.request_queue.put((request_type, request_data, callback))
-        
-    def _send_request_internal(self, request_type, request_data=None, timeout=5):
-        """Internal method to actually send the request"""
-        if not self.ready.is_set() or not self.ws or not self.connected:
-            return None
+    def _on_connection(self, connected):
+        if not connected:
+            self.ready.clear()
+            return
+        self.ready.set()
+        if not self._was_ready:
+            self._was_ready = True
+            self._call_soon(self.on_ready_callback)
 
-        if request_data is None:
-            request_data = {}
+    def _on_subscriptions_changed(self, mask):
+        asyncio.run_coroutine_threadsafe(self.async_client.reidentify(mask), self.loop)
 
-        request_id = f"req_{request_type}_{int(time.time())}"
-        payload = {
-            "op": 6,
-            "d": {
-                "requestType": request_type,
-                "requestId": request_id,
-                "requestData": request_data
-            }
-        }
+    def _call_soon(self, callback, *args):
+        """Run a callback on the callback thread, keeping blocking callers off the event loop."""
+        if callback is None:
+            return
 
+        def run():
+            try:
+                callback(*args)
+            except Exception as e:
+                self.log(f"Callback error: {e}")
         try:
-            with self.lock:
-                if request_id in self.responses:
-                    del self.responses[request_id]
+            self._callbacks.submit(run)
+        except RuntimeError:
+            # Shut down already
+            pass
 
-            self.ws.send(json.dumps(payload))
+    def send_request(self, request_type, request_data=None, callback=None, on_error=None):
+        """
+        Queue request for async processing. `callback` gets the result (None if it failed);
+        `on_error`, if given, gets OBS's requestStatus for a refused request, or None if
+        OBS never answered, just before.
+        """
+        wrapped = callback and (lambda result: self._call_soon(callback, result))
+        wrapped_error = on_error and (lambda status: self._call_soon(on_error, status))
+        self.loop.call_soon_threadsafe(self.async_client.enqueue, request_type, request_data, wrapped, wrapped_error)
 
-            start_time = time.time()
-            while time.time() - start_time < timeout:
-                with self.lock:
-                    if request_id in self.responses:
-                        response = self.responses.pop(request_id)
-                        request_status = response.get('requestStatus', {})
-                        if not request_status.get('result', False):
-                            return None
-                        return response.get('responseData') or True
+    def request_future(self, request_type, request_data=None, timeout=5):
+        """
+        Send a request right away and return a Future for its response.
 
-                time.sleep(0.05)
+        The Future resolves to the response data (True if there is none), or None if OBS
+        reports a failure. It fails with TimeoutError if OBS doesn't answer within `timeout`
+        seconds and with ConnectionError if the connection drops first. Cancelling it
+        stops waiting; a late response is then discarded.
+        """
+        if not self.ready.is_set() or not self.connected:
+            future = Future()
+            future.set_exception(ConnectionError("OBS is not connected"))
+            return future
+        return asyncio.run_coroutine_threadsafe(
+            self.async_client.request(request_type, request_data, timeout), self.loop
+        )
 
+    def _send_request_internal(self, request_type, request_data=None, timeout=5):
+        """Send a request and block until OBS answers; returns the response data, True, or None on failure."""
+        if threading.current_thread() is self.loop_thread:
+            self.log(f"Request {request_type} would block the OBS event loop")
             return None
-
+        future = self.request_future(request_type, request_data, timeout)
+        try:
+            return future.result(timeout=timeout)
         except Exception as e:
-            self.log(f"Send request error: {e}")
+            future.cancel()
+            self.log(f"Request {request_type} failed: {e}")
             return None
 
+    def batch(self, execution_type=RequestBatch.SERIAL_REALTIME, halt_on_failure=False):
+        """
+        Start a RequestBatch; use it as a context manager and it is queued on exit.
+
+        :param execution_type: RequestBatch.SERIAL_REALTIME (in order, as fast as possible),
+                               SERIAL_FRAME (in order, one per OBS frame) or PARALLEL.
+        :param halt_on_failure: Stop at the first failed request (serial types only).
+        """
+        return RequestBatch(self, execution_type, halt_on_failure)
+
+    def send_batch(self, batch):
+        """Queue a RequestBatch for async processing; its `future` resolves with the results."""
+        requests = [(request_type, request_data) for request_type, request_data, _, _ in batch.requests]
+        # on_error runs just before the callback (on the loop), so the statuses are in by then
+        statuses = []
+        self.loop.call_soon_threadsafe(
+            self.async_client.enqueue_batch, requests, batch.execution_type, batch.halt_on_failure,
+            lambda results: self._call_soon(batch.resolve, results, statuses), statuses.extend
+        )
+        return batch.future
+
     def get_version_async(self, callback=None):
         """Get OBS version information asynchronously"""
         self.send_request("GetVersion", callback=callback)
 
     def disconnect(self):
-        """Disconnect from OBS WebSocket"""
-        if self.ws:
+        """
+        Disconnect from OBS WebSocket and shut the client down: the event loop is stopped
+        and closed, its thread joined, and the callback and event workers stopped. The
+        client can't be used afterwards; calling this again does nothing.
+        """
+        if self._closing:
+            return
+        self._closing = True
+        self.ready.clear()
+        future = asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop)
+        future.add_done_callback(lambda _: self.loop.call_soon_threadsafe(self.loop.stop))
+        if threading.current_thread() is not self.loop_thread:
             try:
-                self.ws.close()
+                future.result(timeout=5)
             except Exception as e:
                 self.log(f"Disconnect error: {e}")
-            finally:
-                self.ws = None
-                self.connected = False
-                self.ready.clear()
\ No newline at end of file
+            self.loop_thread.join(timeout=5)
+        self._callbacks.shutdown(wait=False)
+        self.events.shutdown()
+
+    async def _shutdown(self):
+        await self.async_client.close()
+        # Whatever else is still running on the loop (e.g. a connect still retrying) ends with it
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.loop.shutdown_asyncgens()
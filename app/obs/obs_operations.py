@@ -96,9 +96,11 @@ def start_replay_buffer(obs_client: ObsClient = None):
 def get_recording_status(obs_client: ObsClient = None) -> dict:
     """
     Returns a dictionary with the current recording status from OBS.
+
+    Served from the client's event-fed status cache, so this never waits on OBS.
     
     :param obs_client: An instance of ObsClient; if not provided, we'll grab the global one.
-    :return: A dict with keys like 'isRecording', 'isRecordingPaused', etc., or empty if unavailable.
+    :return: A GetRecordStatus-style dict ('outputActive', 'outputPaused', ...), or empty if unavailable.
     """
     if obs_client is None:
         obs_client = globals.obs_client
@@ -107,19 +109,20 @@ def get_recording_status(obs_client: ObsClient = None) -> dict:
         logger.warning("OBS not connected. Cannot get recording status.")
         return {}
     
-    response = obs_client._send_request_internal("GetRecordStatus", {})
-    if not response:
-        logger.warning("Failed to retrieve recording status from OBS.")
-        return {}
-    return response
+    status = obs_client.state.get('record')
+    if not status:
+        logger.warning("Recording status not known yet.")
+    return status
 
 
 def get_streaming_status(obs_client: ObsClient = None) -> dict:
     """
     Returns a dictionary with the current streaming status from OBS.
+
+    Served from the client's event-fed status cache, so this never waits on OBS.
     
     :param obs_client: An instance of ObsClient; if not provided, we'll grab the global one.
-    :return: A dict with keys like 'isStreaming', 'isRecording', etc., or empty if unavailable.
+    :return: A GetStreamStatus-style dict ('outputActive', 'outputReconnecting', ...), or empty if unavailable.
     """
     if obs_client is None:
         obs_client = globals.obs_client
@@ -128,8 +131,7 @@ def get_streaming_status(obs_client: ObsClient = None) -> dict:
         logger.warning("OBS not connected. Cannot get streaming status.")
         return {}
     
-    response = obs_client._send_request_internal("GetStreamStatus", {})
-    if not response:
-        logger.warning("Failed to retrieve streaming status from OBS.")
-        return {}
-    return response
\ No newline at end of file
+    status = obs_client.state.get('stream')
+    if not status:
+        logger.warning("Streaming status not known yet.")
+    return status
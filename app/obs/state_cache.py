@@ -0,0 +1,134 @@
+# app/obs/state_cache.py
+import threading
+import time
+
+VERTICAL_CANVAS_VENDOR = "aitum-vertical-canvas"
+
+# Status kind -> request that fetches it; the vertical canvas kinds are only known from events
+STATUS_REQUESTS = {
+    'record': "GetRecordStatus",
+    'stream': "GetStreamStatus",
+}
+
+# Output states that say whether an output is paused
+PAUSED_STATES = {
+    "OBS_WEBSOCKET_OUTPUT_PAUSED": True,
+    "OBS_WEBSOCKET_OUTPUT_RESUMED": False,
+    "OBS_WEBSOCKET_OUTPUT_STOPPED": False,
+}
+
+# aitum-vertical-canvas vendor event -> (status kind, outputActive)
+VERTICAL_CANVAS_EVENTS = {
+    "recording_started": ('vertical_record', True),
+    "recording_stopped": ('vertical_record', False),
+    "streaming_started": ('vertical_stream', True),
+    "streaming_stopped": ('vertical_stream', False),
+    "backtrack_started": ('vertical_backtrack', True),
+    "backtrack_stopped": ('vertical_backtrack', False),
+}
+
+
+class ObsStateCache:
+    """
+    Recording and streaming status of the main and vertical canvases, kept current
+    from OBS events so reading it never waits on OBS.
+
+    'record' and 'stream' hold GetRecordStatus / GetStreamStatus responses. They are
+    fetched once per connection and then updated from RecordStateChanged and
+    StreamStateChanged (outputActive, outputState, outputPaused). Counters such as
+    outputDuration are as of the last query; a read older than `ttl` seconds returns
+    the cached value and refetches in the background. 'vertical_record',
+    'vertical_stream' and 'vertical_backtrack' come from aitum-vertical-canvas vendor
+    events only ({'outputActive': bool}) and stay empty until the plugin sends one.
+    """
+
+    def __init__(self, obs_client, ttl=30.0):
+        self.obs_client = obs_client
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._status = {}
+        self._fetched_at = {}
+        self._refreshing = set()
+        # Bumped by every event, so a query answered after an event can't undo it
+        self._versions = {}
+
+    def attach(self):
+        """Register for the events and connection changes that keep the cache current."""
+        self.obs_client.events.subscribe("RecordStateChanged", lambda event: self._on_output_event('record', event))
+        self.obs_client.events.subscribe("StreamStateChanged", lambda event: self._on_output_event('stream', event))
+        self.obs_client.events.subscribe("VendorEvent", self._on_vendor_event)
+        self.obs_client.async_client.connection_callbacks.append(self._on_connection)
+
+    def get(self, kind):
+        """
+        The cached status for a kind ('record', 'stream', 'vertical_record', ...) without
+        blocking; {} if it isn't known yet. A missing or expired entry is refetched in the background.
+        """
+        with self._lock:
+            status = dict(self._status.get(kind, {}))
+            fetched_at = self._fetched_at.get(kind)
+        if kind in STATUS_REQUESTS and (fetched_at is None or time.monotonic() - fetched_at > self.ttl):
+            self.refresh(kind)
+        return status
+
+    def refresh(self, kind):
+        """Query OBS for a status kind in the background, unless that query is already on its way."""
+        with self._lock:
+            if kind in self._refreshing:
+                return
+            self._refreshing.add(kind)
+            version = self._versions.get(kind, 0)
+        try:
+            self.obs_client.send_request(
+                STATUS_REQUESTS[kind], callback=lambda response: self._on_query(kind, version, response)
+            )
+        except Exception:
+            with self._lock:
+                self._refreshing.discard(kind)
+            raise
+
+    def _on_query(self, kind, version, response):
+        with self._lock:
+            self._refreshing.discard(kind)
+            if not isinstance(response, dict):
+                return
+            status = dict(response)
+            if self._versions.get(kind, 0) != version:
+                # An event arrived while the query was out; it knows better whether the output is active
+                for key in ('outputActive', 'outputState', 'outputPaused'):
+                    if key in self._status.get(kind, {}):
+                        status[key] = self._status[kind][key]
+            self._status[kind] = status
+            self._fetched_at[kind] = time.monotonic()
+
+    def _update(self, kind, changes):
+        with self._lock:
+            self._status.setdefault(kind, {}).update(changes)
+            self._versions[kind] = self._versions.get(kind, 0) + 1
+
+    def _on_output_event(self, kind, event):
+        changes = {'outputActive': event.data.get('outputActive', False)}
+        state = event.data.get('outputState')
+        if state is not None:
+            changes['outputState'] = state
+        if state in PAUSED_STATES:
+            changes['outputPaused'] = PAUSED_STATES[state]
+        self._update(kind, changes)
+
+    def _on_vendor_event(self, event):
+        if event.data.get('vendorName') != VERTICAL_CANVAS_VENDOR:
+            return
+        change = VERTICAL_CANVAS_EVENTS.get(event.data.get('eventType'))
+        if change is not None:
+            kind, active = change
+            self._update(kind, {'outputActive': active})
+
+    def _on_connection(self, connected):
+        # Whatever we knew may be wrong after OBS restarts; start again from fresh queries
+        with self._lock:
+            self._status.clear()
+            self._fetched_at.clear()
+            self._refreshing.clear()
+        if connected:
+            for kind in STATUS_REQUESTS:
+                self.refresh(kind)
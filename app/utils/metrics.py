@@ -0,0 +1,295 @@
+# app/utils/metrics.py
+import bisect
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Set METRICS_ENABLED=0 to turn every observe/inc into an early return
+enabled = os.getenv('METRICS_ENABLED', '1') != '0'
+
+# Seconds; spans a cached OCR hit (well under 1 ms) up to a stalled capture or OBS request
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """A monotonically increasing count per label combination."""
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        if not enabled:
+            return
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            return self._values.get(key, 0)
+
+    def render(self):
+        with self._lock:
+            values = dict(self._values)
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(values.items())
+        ]
+
+
+class Gauge:
+    """A value per label combination that can go up and down, e.g. a queue depth."""
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def set(self, value, **labels):
+        if not enabled:
+            return
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = value
+
+    def value(self, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            return self._values.get(key, 0)
+
+    def render(self):
+        with self._lock:
+            values = dict(self._values)
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(values.items())
+        ]
+
+
+class Histogram:
+    """
+    Fixed-bucket latency histogram per label combination.
+
+    Observations only bump one bucket count; buckets are made cumulative when rendered.
+    """
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # label values -> [bucket counts (+Inf last), sum, count]
+        self._series = {}
+
+    def observe(self, value, **labels):
+        if not enabled:
+            return
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall time spent inside the `with` block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def snapshot(self, **labels):
+        """(bucket counts, sum, count) for one label combination, or None if never observed."""
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            return None if series is None else (list(series[0]), series[1], series[2])
+
+    def render(self):
+        with self._lock:
+            series = {key: (list(counts), total, count) for key, (counts, total, count) in self._series.items()}
+
+        lines = []
+        for key, (counts, total, count) in sorted(series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = 'le="+Inf"' if bound == float('inf') else f'le="{bound!r}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class Summary:
+    """
+    Quantiles over a sliding window of the most recent observations per label combination.
+
+    Unlike Histogram the quantiles are exact, which matters for a p99 over a few hundred
+    overlay updates, at the cost of sorting the window whenever they are read.
+    """
+    kind = 'summary'
+
+    def __init__(self, name, documentation, labelnames=(), quantiles=(0.5, 0.99), window=1024):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.quantile_levels = tuple(quantiles)
+        self.window = window
+        self._lock = threading.Lock()
+        # label values -> [recent observations, sum, count]
+        self._series = {}
+
+    def observe(self, value, **labels):
+        if not enabled:
+            return
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [deque(maxlen=self.window), 0.0, 0]
+            series[0].append(value)
+            series[1] += value
+            series[2] += 1
+
+    @staticmethod
+    def _quantiles(values, levels):
+        ordered = sorted(values)
+        return {level: ordered[min(len(ordered) - 1, int(level * len(ordered)))] for level in levels}
+
+    def quantiles(self, **labels):
+        """{level: value} over the current window for one label combination, or {} if empty."""
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            values = list(series[0]) if series else []
+        return self._quantiles(values, self.quantile_levels) if values else {}
+
+    def snapshot(self):
+        """{label values: {'count', 'sum', quantile level: value}} for every label combination."""
+        with self._lock:
+            series = {key: (list(values), total, count) for key, (values, total, count) in self._series.items()}
+        result = {}
+        for key, (values, total, count) in series.items():
+            result[key] = {'count': count, 'sum': total}
+            if values:
+                result[key].update(self._quantiles(values, self.quantile_levels))
+        return result
+
+    def render(self):
+        lines = []
+        for key, stats in sorted(self.snapshot().items()):
+            for level in self.quantile_levels:
+                if level in stats:
+                    quantile = f'quantile="{level!r}"'
+                    lines.append(f"{self.name}{_format_labels(self.labelnames, key, quantile)} {_format_value(stats[level])}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(stats['sum'])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {stats['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds every metric and renders them in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric '{metric.name}' is already registered with a different type or labels")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def summary(self, name, documentation, labelnames=(), quantiles=(0.5, 0.99), window=1024):
+        return self._register(Summary(name, documentation, labelnames, quantiles, window))
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+# Hot-path stages: capture, preprocess, ocr, handler, parse, file_write, obs_request
+stage_seconds = registry.histogram(
+    'overlay_stage_seconds', "Time spent in each stage of the OCR loop", ('stage', 'region')
+)
+# Region outcomes: processed, unchanged, cache_hit, glyph_hit, tesseract, error
+region_events = registry.counter(
+    'overlay_region_events_total', "Region outcomes in the OCR loop", ('region', 'event')
+)
+loop_iterations = registry.counter(
+    'overlay_loop_iterations_total', "OCR loop ticks that grabbed a frame"
+)
+# From the frame being captured to the overlay showing it: sink is 'obs' (request
+# acknowledged by OBS) or 'file' (text file written for an OBS text source)
+capture_to_overlay = registry.summary(
+    'overlay_capture_to_overlay_seconds', "Frame capture to overlay update latency", ('sink',)
+)
+
+
+def observe_overlay_latency(captured_at, sink):
+    """Record the time since `captured_at` (time.time() of the frame capture); no-op without one."""
+    if captured_at is not None:
+        capture_to_overlay.observe(time.time() - captured_at, sink=sink)
+
+
+def latency_report(summary=capture_to_overlay):
+    """Count and p50/p99 in milliseconds per sink of a latency summary, e.g. for the session log."""
+    report = {}
+    for (sink,), stats in summary.snapshot().items():
+        report[sink] = {'count': stats['count']}
+        for level in summary.quantile_levels:
+            if level in stats:
+                report[sink][f"p{round(level * 100)}_ms"] = round(stats[level] * 1000, 1)
+    return report
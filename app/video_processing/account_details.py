@@ -3,13 +3,17 @@
 import os
 import re
 import json
+import time
 import pytesseract
+from app.video_processing import ocr
 from datetime import datetime
 from app.config.globals import shutdown_event, tiktok_streamer, instagram_streamer, settings_manager, obs_ready
 from app.config import globals as app_globals
-from app.obs.obs_client import ObsClient
+from app.obs.obs_client import ObsClient, RequestBatch
 from app.obs.obs_operations import toggle_recording
 from app.services.stream_manager import StreamManager
+from app.video_processing.overlay_state import overlay_state, output_sinks, obs_input_name
+from app.utils.metrics import stage_seconds, region_events, observe_overlay_latency
 
 
 # File paths
@@ -34,23 +38,25 @@ global_account_details = {
     'totalAccountValue': 0.00
 }
 global_profit_mode = False
+OCR_CONFIG = ''
 stream_manager = StreamManager()
 
 
 def ensure_files_exist():
-    """Ensure the logs directory and all required files exist"""
+    """Ensure the logs directory and all required files exist. Called once at startup."""
     try:
         if not os.path.exists(logs_dir):
             os.makedirs(logs_dir)
         
         for filename in required_files:
             file_path = os.path.join(logs_dir, filename)
-            if not os.path.exists(file_path):
-                with open(file_path, 'w') as f:
-                    if filename == 'error_log.txt':
+            if filename == 'error_log.txt':
+                if not os.path.exists(file_path):
+                    with open(file_path, 'w') as f:
                         f.write(f"Error log created on {datetime.now()}\n")
-                    else:
-                        f.write("0.00\n")
+            else:
+                # Also loads the current value, so an unchanged first reading isn't rewritten
+                overlay_state.ensure_file(file_path, "0.00\n")
     except Exception as e:
         log_error(f"File creation error: {e}")
 
@@ -65,19 +71,31 @@ def log_error(error_message):
         print(f"Error writing to error log: {e}")
 
 
-def set_source_color(color, inputName, obs_client: ObsClient):
-    """Wrapper to send a request to OBS for changing a single source color."""
+def set_source_color(color, inputName, obs_client: ObsClient, captured_at=None, text=None):
+    """
+    Wrapper to send a request to OBS for changing a single source color, and
+    its text too when `text` is given (in the same request). Nothing is sent
+    if the source already shows this. With `captured_at` (capture time of the
+    frame behind this change), the capture-to-overlay latency is recorded once
+    OBS acknowledges the request.
+    """
+    settings = {"color": color}
+    if text is not None:
+        settings["text"] = text
     try:
-        obs_client.send_request("SetInputSettings", {
-            "inputName": inputName,
-            "inputSettings": {
-                "color": color
-            }
-        })
+        overlay_state.update_source(obs_client, inputName, settings, captured_at, region='account')
     except Exception as e:
         log_error(f"Error setting source color for {inputName}: {e}")
 
 
+def set_source_text(text, inputName, obs_client: ObsClient, captured_at=None):
+    """Push text straight into an OBS text input (skipped if it already shows it)."""
+    try:
+        overlay_state.update_source(obs_client, inputName, {"text": text}, captured_at, region='account')
+    except Exception as e:
+        log_error(f"Error setting source text for {inputName}: {e}")
+
+
 def toggle_profit_mode(profit_mode: bool, obs_client: ObsClient):
     global global_profit_mode
     if not obs_ready.is_set():
@@ -128,27 +146,33 @@ def format_percentage_line(line):
     return formatted_line
 
 
-def write_to_file(file_path, content):
-    """Write content to file with error handling."""
+def write_to_file(file_path, content, captured_at=None):
+    """
+    Publish content to an overlay file with error handling. The file is only
+    rewritten (atomically) when its content changes; returns True either way.
+    """
     try:
-        with open(file_path, 'w') as f:
-            f.write(content)
+        with stage_seconds.time(stage='file_write', region='account'):
+            if overlay_state.write_text(file_path, content):
+                observe_overlay_latency(captured_at, 'file')
         return True
     except Exception as e:
         log_error(f"Error writing to {file_path}: {e}")
         return False
 
 
-def process_pl(amount, percentage, file_name, overlay_name, data_key, obs_client: ObsClient):
+def process_pl(amount, percentage, file_name, overlay_name, data_key, obs_client: ObsClient, captured_at=None):
     """
     Processes P/L values (either daysPL or openPL). Updates the text file and sets
-    the color on the relevant OBS sources. Also multiplies values by the user-defined
+    the color on the relevant OBS sources (and their text, depending on the
+    'overlay_output' setting). Also multiplies values by the user-defined
     multiplier if needed.
     """
     global global_account_details
     try:
         cleaned_money = float(amount.replace(",", "").replace("+", ""))
         multiplier = settings_manager.get_setting('multiplier')
+        to_file, to_obs = output_sinks(settings_manager.get_setting('overlay_output'))
 
         # Decide which overlay(s) to update
         # If you only need both overlays for openPL, check data_key == 'openPL'.
@@ -162,11 +186,12 @@ def process_pl(amount, percentage, file_name, overlay_name, data_key, obs_client
         if cleaned_money == 0.0:
             # Write out the raw 0.00 + percentage
             content = f"{amount} {percentage}\n"
-            if write_to_file(file_name, content):
-                # Yellow-ish color if zero
+            if not to_file or write_to_file(file_name, content, captured_at=captured_at):
+                # Yellow-ish color if zero; all overlays change in one batch
                 zero_color = 4291936183
-                for ovr in overlays:
-                    set_source_color(zero_color, ovr, obs_client)
+                with obs_client.batch(RequestBatch.PARALLEL) as batch:
+                    for ovr in overlays:
+                        set_source_color(zero_color, ovr, batch, captured_at, text=content.strip() if to_obs else None)
 
                 global_account_details[data_key]['amount'] = amount
                 global_account_details[data_key]['percentage'] = percentage
@@ -176,24 +201,28 @@ def process_pl(amount, percentage, file_name, overlay_name, data_key, obs_client
             modified_money_str = f"{modified_money:+,.2f}"
             content = f"{modified_money_str} {percentage}\n"
             
-            if write_to_file(file_name, content):
+            if not to_file or write_to_file(file_name, content, captured_at=captured_at):
                 global_account_details[data_key]['amount'] = modified_money_str
                 global_account_details[data_key]['percentage'] = percentage
 
                 # Color is different if negative vs positive
                 color = 4280423350 if cleaned_money < 0 else 4288463367
-                for ovr in overlays:
-                    set_source_color(color, ovr, obs_client)
+                with obs_client.batch(RequestBatch.PARALLEL) as batch:
+                    for ovr in overlays:
+                        set_source_color(color, ovr, batch, captured_at, text=content.strip() if to_obs else None)
 
     except Exception as e:
         log_error(f"Error processing PL for {data_key}: {e}")
 
 
-def process_account(cropped_frame, obs_client: ObsClient = None):
+def process_account(cropped_frame, obs_client: ObsClient = None, extracted_text=None, captured_at=None):
     """
     Main function to parse the OCR text from the cropped_frame,
     update text files, and set colors in OBS for all relevant
-    account details.
+    account details. Pass `extracted_text` when the frame was
+    already OCR'd elsewhere (e.g. by the OCR executor), and
+    `captured_at` (time.time() of the frame capture) to track
+    capture-to-overlay latency.
     """
     global global_account_details
     
@@ -201,8 +230,6 @@ def process_account(cropped_frame, obs_client: ObsClient = None):
         return
 
     try:
-        ensure_files_exist()
-
         if not obs_ready.is_set():
             log_error("Cannot process account - OBS not ready")
             return
@@ -213,7 +240,8 @@ def process_account(cropped_frame, obs_client: ObsClient = None):
                 log_error("Cannot process account - OBS client not initialized")
                 return
 
-        extracted_text = pytesseract.image_to_string(cropped_frame)
+        if extracted_text is None:
+            extracted_text = ocr.image_to_string(cropped_frame, region='account', config=OCR_CONFIG, profile='account')
         lines = [line for line in extracted_text.split('\n') if line.strip()]
 
         data_order = [
@@ -231,6 +259,7 @@ def process_account(cropped_frame, obs_client: ObsClient = None):
 
         for i, line in enumerate(lines):
             try:
+                parse_start = time.perf_counter()
                 data_type = data_order[i]
                 if data_type == 'openPL':
                     line = correct_ocr_errors(line)
@@ -239,6 +268,7 @@ def process_account(cropped_frame, obs_client: ObsClient = None):
                 # Remove stray alpha chars (common OCR noise)
                 line = re.sub(r"\b[a-zA-Z]+\b", "", line)
                 match = re.findall(pattern, line)
+                stage_seconds.observe(time.perf_counter() - parse_start, stage='parse', region='account')
 
                 if match:
                     amount, percentage = match[0]
@@ -251,16 +281,25 @@ def process_account(cropped_frame, obs_client: ObsClient = None):
                         else:
                             overlay_name = "Daily Profit Overlay"
 
-                        process_pl(amount, percentage, file_path, overlay_name, data_type, obs_client)
+                        process_pl(amount, percentage, file_path, overlay_name, data_type, obs_client, captured_at)
                     else:
                         # For non-PL data, multiply if needed and just write
                         amount_value = float(amount.replace(',', ''))
                         modified_value = amount_value * settings_manager.get_setting('multiplier')
                         global_account_details[data_type] = f"{modified_value:.2f}"
 
-                        file_path = os.path.join(logs_dir, f'{data_type}.txt')
-                        write_to_file(file_path, f"${modified_value:,.2f}")
+                        text = f"${modified_value:,.2f}"
+                        to_file, to_obs = output_sinks(settings_manager.get_setting('overlay_output'))
+                        if to_file:
+                            file_path = os.path.join(logs_dir, f'{data_type}.txt')
+                            write_to_file(file_path, text, captured_at=captured_at)
+                        # The P/L values go to the overlays whose color changes; the rest
+                        # to the text inputs named in the 'obs_inputs' setting
+                        input_name = obs_input_name(settings_manager, data_type)
+                        if to_obs and input_name:
+                            set_source_text(text, input_name, obs_client, captured_at)
             except Exception as e:
+                region_events.inc(region='account', event='error')
                 log_error(f"Error processing line {i} ({data_type}): {e}")
 
         # Check for awards reset condition (example condition)
@@ -281,4 +320,5 @@ def process_account(cropped_frame, obs_client: ObsClient = None):
         log_error(f"Tesseract Error: {e}")
         shutdown_event.set()
     except Exception as e:
+        region_events.inc(region='account', event='error')
         log_error(f"General error in process_account: {e}")
\ No newline at end of file
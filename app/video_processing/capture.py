@@ -1,20 +1,248 @@
 # app/video_processing/capture.py
-import cv2
+import threading
+import time
+import numpy as np
+from app.video_processing.frame_sources import CameraSource
+from app.video_processing.frame_ring import SharedFrameRing
 
 class FrameCapturer:
-    def __init__(self, camera_index=8, width=1920, height=1080):
+    def __init__(self, camera_index=8, width=1920, height=1080, background=False, source=None, shared_slots=0):
+        """
+        :param source: A FrameSource to read from (video file, image directory, OBS...);
+                       defaults to the capture card at `camera_index`.
+        :param shared_slots: Read frames into a ring of this many shared-memory slots, so
+                             OCR worker processes can crop them without a copy (0 = off).
+        """
         self.camera_index = camera_index
-        self.cap = cv2.VideoCapture(self.camera_index)
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        self.source = source if source is not None else CameraSource(camera_index, width, height)
+        # Reused on every grab so a tick doesn't allocate a fresh full-size frame
+        self.frame_buffer = np.empty((height, width, 3), dtype=np.uint8)
+        self.last_frame_time = None
+
+        # With a ring, the frame behind the last capture_regions call stays referenced
+        # (and so unmodified) until the next call; see current_frame
+        self.ring = SharedFrameRing(shared_slots, (height, width, 3)) if shared_slots else None
+        self.current_frame = None
+        # Rings replaced after the source turned out to deliver another frame size; OCR
+        # jobs may still be reading them, so they're only freed in release()
+        self._retired_rings = []
+
+        # Background capture state. _latest is replaced wholesale with a
+        # (sequence, timestamp, frame) tuple, so readers never need the lock.
+        self._latest = None
+        self._frame_ready = threading.Condition()
+        self._stop_event = threading.Event()
+        self.capture_thread = None
+        if background:
+            self.start_background_capture()
+
+    def start_background_capture(self):
+        """Drain the device on a dedicated thread, keeping only the newest frame."""
+        if self.capture_thread and self.capture_thread.is_alive():
+            return
+
+        # Keep the driver queue as short as possible; not every backend supports it
+        self.source.set_buffer_size(1)
+        self._stop_event.clear()
+        self.capture_thread = threading.Thread(target=self._capture_loop, name="CaptureThread", daemon=True)
+        self.capture_thread.start()
+
+    def _read_into_ring(self):
+        """Read one frame into a free ring slot and publish it; returns (sequence, timestamp, frame) or None."""
+        slot = self.ring.writable_slot()
+        if slot is None:
+            # Every slot is still being read; drop this frame rather than block the device
+            return None
+
+        dst = self.ring.frame(slot)
+        ret, frame = self.source.read(dst)
+        if not ret or frame is None:
+            self.ring.abandon(slot)
+            return None
+        if frame is not dst:
+            if frame.shape != dst.shape:
+                self.ring.abandon(slot)
+                self._resize_ring(frame.shape)
+                slot = self.ring.writable_slot()
+                dst = self.ring.frame(slot)
+            np.copyto(dst, frame)
+
+        timestamp = time.time()
+        return self.ring.publish(slot, timestamp), timestamp, dst
+
+    def _resize_ring(self, shape):
+        """Swap in a ring sized for `shape`, like the plain frame buffer adopts a new size."""
+        retired = self.ring
+        print(f"Frames are {shape[1]}x{shape[0]}, not {retired.shape[1]}x{retired.shape[0]}; resizing the shared frame ring")
+        self.ring = SharedFrameRing(len(retired), shape, retired.dtype)
+        self._retired_rings.append(retired)
+
+    def _capture_loop(self):
+        sequence = 0
+        while not self._stop_event.is_set():
+            if self.ring is not None:
+                latest = self._read_into_ring()
+                if latest is None:
+                    time.sleep(0.01)
+                    continue
+                self._latest = latest
+                with self._frame_ready:
+                    self._frame_ready.notify_all()
+                continue
+
+            # A fresh array per read: a published frame is never written to again,
+            # so consumers can keep views of it for as long as they like.
+            ret, frame = self.source.read()
+            if not ret or frame is None:
+                time.sleep(0.01)
+                continue
+
+            sequence += 1
+            self._latest = (sequence, time.time(), frame)
+            with self._frame_ready:
+                self._frame_ready.notify_all()
+
+    def latest_frame(self):
+        """
+        Return the newest (frame, timestamp) from the capture thread without blocking, or None.
+
+        With a shared frame ring the frame is a copy, since the capture thread reuses
+        ring slots; capture_regions/current_frame give zero-copy access instead.
+        """
+        latest = self._latest
+        if latest is None:
+            return None
+        return self._snapshot(latest)
+
+    def wait_for_frame(self, newer_than=None, timeout=1.0):
+        """
+        Block until the capture thread publishes a frame captured after `newer_than`.
+
+        :param newer_than: Timestamp (time.time()) the frame must be newer than; None accepts any frame.
+        :param timeout: Seconds to wait before giving up.
+        :return: (frame, timestamp), or None on timeout. With a shared frame ring the
+                 frame is a copy (see latest_frame).
+        """
+        latest = self._wait_for_latest(newer_than, timeout)
+        if latest is None:
+            return None
+        return self._snapshot(latest)
+
+    def _wait_for_latest(self, newer_than, timeout):
+        """Block until _latest is newer than `newer_than`; returns it, or None on timeout or stop."""
+        deadline = time.time() + timeout
+        with self._frame_ready:
+            while True:
+                latest = self._latest
+                if latest is not None and (newer_than is None or latest[1] > newer_than):
+                    return latest
+
+                remaining = deadline - time.time()
+                if remaining <= 0 or self._stop_event.is_set():
+                    return None
+                self._frame_ready.wait(remaining)
+
+    def _snapshot(self, latest):
+        """(frame, timestamp) for a published frame; ring frames are copied out while referenced."""
+        _, timestamp, frame = latest
+        ring = self.ring
+        if ring is None:
+            return frame, timestamp
+
+        # The slot behind `latest` may already be rewritten; the ring's newest frame is
+        # at least as new and can't be while we hold it
+        frame_ref = ring.acquire_latest()
+        if frame_ref is None:
+            return None
+        try:
+            return frame_ref.frame.copy(), frame_ref.timestamp
+        finally:
+            frame_ref.release()
 
     def capture_frame(self, x1, y1, x2, y2):
-        ret, frame = self.cap.read()
+        ret, frame = self.source.read()
         if ret and frame is not None:
             cropped_frame = frame[y1:y2, x1:x2]
             return cropped_frame
         return None
 
+    def _grab_ring_frame(self):
+        """Reference the next ring frame for this tick, releasing the previous tick's frame."""
+        if self.current_frame is not None:
+            self.current_frame.release()
+            self.current_frame = None
+
+        if self.capture_thread and self.capture_thread.is_alive():
+            # Wait for the capture thread to publish something newer than what we last read
+            if self._wait_for_latest(self.last_frame_time, timeout=1.0) is None:
+                return None
+        elif self._read_into_ring() is None:
+            return None
+
+        frame_ref = self.ring.acquire_latest()
+        if frame_ref is None:
+            return None
+        self.current_frame = frame_ref
+        self.last_frame_time = frame_ref.timestamp
+        return frame_ref.frame
+
+    def _grab_frame(self):
+        """Return the next frame for this tick and record its capture time."""
+        if self.ring is not None:
+            return self._grab_ring_frame()
+
+        if self.capture_thread and self.capture_thread.is_alive():
+            result = self.wait_for_frame(newer_than=self.last_frame_time)
+            if result is None:
+                return None
+            frame, self.last_frame_time = result
+            return frame
+
+        ret, frame = self.source.read(self.frame_buffer)
+        if not ret or frame is None:
+            return None
+
+        # Sources hand back a new array if the frame size doesn't match the buffer
+        if frame is not self.frame_buffer:
+            self.frame_buffer = frame
+        self.last_frame_time = time.time()
+        return frame
+
+    def capture_regions(self, regions):
+        """
+        Grab a single frame and crop every region from it.
+
+        In synchronous mode the frame is read into the reusable buffer; with background
+        capture running, the newest frame not yet returned is used instead.
+
+        :param regions: Dict mapping a region name to an (x1, y1, x2, y2) rectangle.
+        :return: Dict of region name -> view into the frame, or None if no frame was available.
+                 In synchronous mode the views are only valid until the next capture.
+                 With a shared frame ring, `current_frame` references the same frame
+                 (use `current_frame.retain()` to hand it to another process).
+        """
+        frame = self._grab_frame()
+        if frame is None:
+            return None
+
+        return {
+            name: frame[y1:y2, x1:x2]
+            for name, (x1, y1, x2, y2) in regions.items()
+        }
+
     def release(self):
-        if self.cap.isOpened():
-            self.cap.release()
+        self._stop_event.set()
+        with self._frame_ready:
+            self._frame_ready.notify_all()
+        if self.capture_thread and self.capture_thread.is_alive():
+            self.capture_thread.join(timeout=2)
+
+        self.source.release()
+        if self.current_frame is not None:
+            self.current_frame.release()
+            self.current_frame = None
+        if self.ring is not None:
+            self.ring.close()
+        for ring in self._retired_rings:
+            ring.close()
+        self._retired_rings = []
@@ -0,0 +1,68 @@
+# app/video_processing/change_detection.py
+import threading
+import time
+import numpy as np
+
+
+class RegionChangeDetector:
+    """
+    Decides per region whether a crop differs enough from the last crop that was
+    OCR'd to be worth running Tesseract again.
+
+    Crops are compared on a strided downsample using the mean absolute difference
+    of pixel values (0-255). A region is also refreshed after `refresh_interval`
+    seconds so a missed update can't stick forever.
+    """
+
+    def __init__(self, threshold=2.0, downsample=4, refresh_interval=5.0, thresholds=None):
+        self.threshold = threshold
+        self.downsample = downsample
+        self.refresh_interval = refresh_interval
+        self.thresholds = dict(thresholds or {})
+        self._lock = threading.Lock()
+        self._references = {}
+        self._stats = {}
+
+    def _signature(self, crop):
+        step = self.downsample
+        return np.asarray(crop)[::step, ::step].astype(np.int16)
+
+    def should_process(self, region, crop):
+        """
+        Return True if `region` changed since its last OCR, recording `crop` as the new
+        reference. Returns False (and counts a skip) when the pixels are unchanged.
+        """
+        signature = self._signature(crop)
+        now = time.time()
+        threshold = self.thresholds.get(region, self.threshold)
+
+        with self._lock:
+            stats = self._stats.setdefault(region, {'processed': 0, 'skipped': 0})
+            reference = self._references.get(region)
+
+            changed = (
+                reference is None
+                or reference[1].shape != signature.shape
+                or now - reference[0] >= self.refresh_interval
+                or np.abs(signature - reference[1]).mean() > threshold
+            )
+
+            if changed:
+                self._references[region] = (now, signature)
+                stats['processed'] += 1
+            else:
+                stats['skipped'] += 1
+            return changed
+
+    def reset(self, region=None):
+        """Forget the reference crop for one region (or all), forcing the next OCR."""
+        with self._lock:
+            if region is None:
+                self._references.clear()
+            else:
+                self._references.pop(region, None)
+
+    def get_stats(self):
+        """Return {region: {'processed': n, 'skipped': n}} counters."""
+        with self._lock:
+            return {region: dict(stats) for region, stats in self._stats.items()}
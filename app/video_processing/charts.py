@@ -1,26 +1,27 @@
 # app/video_processing/charts.py
 import os
 import re
+import time
 import pytesseract
-from app.config.globals import shutdown_event
+from app.video_processing import ocr
+from app.utils.metrics import stage_seconds, region_events, observe_overlay_latency
+from app.video_processing.overlay_state import overlay_state, output_sinks, obs_input_name
+from app.config.globals import shutdown_event, settings_manager
+from app.config import globals as app_globals
 
 script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 logs_dir = os.path.join(script_dir, 'logs')
 chart_file = os.path.join(logs_dir, 'chart.txt')
+OCR_CONFIG = ''
+# Ticker currently on the overlay; picked up from chart.txt on the first frame
+last_ticker = None
 
 def ensure_files_exist():
-    """Ensure the logs directory and chart.txt file exist"""
+    """Ensure the logs directory and chart.txt file exist. Called once at startup."""
     try:
-        # Create logs directory if it doesn't exist
-        if not os.path.exists(logs_dir):
-            os.makedirs(logs_dir)
-            print(f"Created logs directory at: {logs_dir}")
-
-        # Create chart.txt if it doesn't exist
         if not os.path.exists(chart_file):
-            with open(chart_file, 'w') as f:
-                f.write("")
-            print(f"Created chart.txt at: {chart_file}")
+            print(f"Creating chart.txt at: {chart_file}")
+        overlay_state.ensure_file(chart_file)
     except Exception as e:
         print(f"Error creating necessary files: {e}")
 
@@ -31,55 +32,64 @@ def fix_chart_errors(extracted_text):
 
 def read_from_file(file_path):
     try:
-        if os.path.exists(file_path):
-            with open(file_path, 'r') as f:
-                return f.read()
-        return ""
+        return overlay_state.read_text(file_path)
     except Exception as e:
         print(f"Error reading file {file_path}: {e}")
         return ""
 
 def write_to_file(file_path, content):
     try:
-        with open(file_path, 'w') as f:
-            f.write(content)
+        with stage_seconds.time(stage='file_write', region='chart'):
+            overlay_state.write_text(file_path, content)
         return True
     except Exception as e:
         print(f"Error writing to file {file_path}: {e}")
         return False
 
-def process_chart(cropped_frame):
+def process_chart(cropped_frame, extracted_text=None, captured_at=None):
+    global last_ticker
     if shutdown_event.is_set():
         print("Process chart terminated due to shutdown signal.")
         return
 
     try:
-        # Ensure necessary files exist before processing
-        ensure_files_exist()
-
-        extracted_text = pytesseract.image_to_string(cropped_frame)
+        if extracted_text is None:
+            extracted_text = ocr.image_to_string(cropped_frame, region='chart', config=OCR_CONFIG, profile='chart')
+        parse_start = time.perf_counter()
         extracted_text = fix_chart_errors(extracted_text)
 
         match = re.search(r'([A-Za-z]+) (.+?) (\d+)', extracted_text)
+        stage_seconds.observe(time.perf_counter() - parse_start, stage='parse', region='chart')
         if match:
             ticker = match.group(1)
             company_name = match.group(2)
             formatted_text = f"{company_name} ( ${ticker} )"
 
-            existing_text = read_from_file(chart_file)
-            existing_match = re.search(r'\( \$([A-Z]+) \)', existing_text)
-            existing_ticker = existing_match.group(1) if existing_match else ""
+            if last_ticker is None:
+                existing_match = re.search(r'\( \$([A-Z]+) \)', read_from_file(chart_file))
+                last_ticker = existing_match.group(1) if existing_match else ""
 
-            if ticker != existing_ticker:
-                if write_to_file(chart_file, f"{formatted_text}\n"):
-                    print(f"Updated chart.txt with {formatted_text}")
-                else:
-                    print("Failed to update chart.txt")
+            # Only a new ticker counts; the company name wobbles between OCR reads
+            if ticker != last_ticker:
+                to_file, to_obs = output_sinks(settings_manager.get_setting('overlay_output'))
+                if to_file:
+                    if write_to_file(chart_file, f"{formatted_text}\n"):
+                        observe_overlay_latency(captured_at, 'file')
+                        print(f"Updated chart.txt with {formatted_text}")
+                    else:
+                        print("Failed to update chart.txt")
+                        return
+                # The OBS text input for the chart title comes from the 'obs_inputs' setting
+                input_name = obs_input_name(settings_manager, 'chart')
+                if to_obs and input_name and app_globals.obs_client is not None:
+                    overlay_state.update_source(app_globals.obs_client, input_name, {"text": formatted_text}, captured_at, region='chart')
+                last_ticker = ticker
 
     except (KeyboardInterrupt, pytesseract.pytesseract.TesseractError) as e:
         print(f"Tesseract error: {e}")
         shutdown_event.set()
         return
     except Exception as e:
+        region_events.inc(region='chart', event='error')
         print(f"General error during Tesseract processing: {e}")
         return
\ No newline at end of file
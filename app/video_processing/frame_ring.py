@@ -0,0 +1,182 @@
+# app/video_processing/frame_ring.py
+import threading
+from multiprocessing import shared_memory
+import numpy as np
+
+# Keep this module light: OCR worker processes import it to attach to the ring.
+
+
+class FrameRef:
+    """
+    A counted reference to one published frame in a SharedFrameRing.
+
+    The slot won't be overwritten until every reference is released, so `frame`
+    (a view straight into shared memory) stays valid until `release` is called.
+    """
+
+    def __init__(self, ring, slot, sequence, timestamp):
+        self.ring = ring
+        self.slot = slot
+        self.sequence = sequence
+        self.timestamp = timestamp
+        self.frame = ring.frame(slot)
+        self._released = False
+
+    def retain(self):
+        """Take another reference to the same slot (e.g. for an OCR job); release it separately."""
+        self.ring.acquire(self.slot)
+        return FrameRef(self.ring, self.slot, self.sequence, self.timestamp)
+
+    def descriptor(self, rect):
+        """Picklable description of a crop of this frame, for `attach_crop` in another process."""
+        return (self.ring.frames_name, self.ring.sequences_name, self.ring.shape, self.ring.dtype.str,
+                len(self.ring), self.slot, self.sequence, tuple(rect))
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self.ring.release(self.slot)
+
+
+class SharedFrameRing:
+    """
+    A fixed ring of full-frame slots in shared memory, owned by the capturing process.
+
+    The capture side asks for a `writable_slot`, reads the next frame straight into it
+    and `publish`es it, which stamps the slot with a new sequence number. Readers take
+    counted references with `acquire_latest`; a slot is only handed out for writing
+    again once nobody holds a reference to it and it isn't the newest frame. The
+    sequence numbers also live in shared memory, so a worker can check that the slot
+    it was pointed at still holds the frame it was meant to read.
+    """
+
+    def __init__(self, slots=4, shape=(1080, 1920, 3), dtype=np.uint8):
+        if slots < 2:
+            raise ValueError("A frame ring needs at least two slots")
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        frame_bytes = int(np.prod(self.shape)) * self.dtype.itemsize
+
+        self._frames_shm = shared_memory.SharedMemory(create=True, size=slots * frame_bytes)
+        self._sequences_shm = shared_memory.SharedMemory(create=True, size=slots * 8)
+        self._frames = np.ndarray((slots,) + self.shape, dtype=self.dtype, buffer=self._frames_shm.buf)
+        self._sequences = np.ndarray((slots,), dtype=np.int64, buffer=self._sequences_shm.buf)
+        self._sequences[:] = 0
+
+        self._lock = threading.Lock()
+        self._refcounts = [0] * slots
+        self._writing = [False] * slots
+        self._timestamps = [None] * slots
+        self._latest = None
+        self._sequence = 0
+        self.dropped = 0
+
+    def __len__(self):
+        return len(self._refcounts)
+
+    @property
+    def frames_name(self):
+        return self._frames_shm.name
+
+    @property
+    def sequences_name(self):
+        return self._sequences_shm.name
+
+    def frame(self, slot):
+        """View of one slot's pixels (no copy)."""
+        return self._frames[slot]
+
+    def writable_slot(self):
+        """
+        Reserve a slot for the next frame.
+
+        :return: Slot index, or None if every slot is still referenced (the frame should be dropped).
+        """
+        with self._lock:
+            for slot in range(len(self._refcounts)):
+                if slot != self._latest and self._refcounts[slot] == 0 and not self._writing[slot]:
+                    self._writing[slot] = True
+                    return slot
+            self.dropped += 1
+            return None
+
+    def publish(self, slot, timestamp):
+        """Make a slot that was just written the newest frame; returns its sequence number."""
+        with self._lock:
+            self._sequence += 1
+            self._sequences[slot] = self._sequence
+            self._timestamps[slot] = timestamp
+            self._writing[slot] = False
+            self._latest = slot
+            return self._sequence
+
+    def abandon(self, slot):
+        """Give back a slot from `writable_slot` without publishing it (e.g. the read failed)."""
+        with self._lock:
+            self._writing[slot] = False
+
+    def acquire_latest(self, newer_than=0):
+        """
+        Reference the newest frame if its sequence number is above `newer_than`.
+
+        :return: A FrameRef, or None if there is no such frame yet.
+        """
+        with self._lock:
+            if self._latest is None or self._sequence <= newer_than:
+                return None
+            slot = self._latest
+            self._refcounts[slot] += 1
+            return FrameRef(self, slot, self._sequence, self._timestamps[slot])
+
+    def acquire(self, slot):
+        with self._lock:
+            self._refcounts[slot] += 1
+
+    def release(self, slot):
+        with self._lock:
+            if self._refcounts[slot] > 0:
+                self._refcounts[slot] -= 1
+
+    def refcount(self, slot):
+        with self._lock:
+            return self._refcounts[slot]
+
+    def close(self):
+        """Free the shared memory; only the owner calls this, after workers have stopped."""
+        self._frames = self._sequences = None
+        for shm in (self._frames_shm, self._sequences_shm):
+            try:
+                shm.close()
+            except BufferError:
+                # Someone still holds a view; the mapping goes away with the last of them
+                pass
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+# Segments this process has attached to, by name; attaching is a syscall plus mmap,
+# so workers keep them open for the life of the process
+_attached = {}
+
+
+def _attach(name):
+    shm = _attached.get(name)
+    if shm is None:
+        shm = _attached[name] = shared_memory.SharedMemory(name=name)
+    return shm
+
+
+def attach_crop(descriptor):
+    """
+    Zero-copy view of a crop described by `FrameRef.descriptor`, for use in another process.
+
+    :raises RuntimeError: If the slot has since been reused for a different frame.
+    """
+    frames_name, sequences_name, shape, dtype, slots, slot, sequence, (x1, y1, x2, y2) = descriptor
+    sequences = np.ndarray((slots,), dtype=np.int64, buffer=_attach(sequences_name).buf)
+    if sequences[slot] != sequence:
+        raise RuntimeError(f"Frame slot {slot} was reused (expected sequence {sequence}, found {sequences[slot]})")
+    frames = np.ndarray((slots,) + tuple(shape), dtype=np.dtype(dtype), buffer=_attach(frames_name).buf)
+    return frames[slot, y1:y2, x1:x2]
@@ -0,0 +1,233 @@
+# app/video_processing/frame_sources.py
+import abc
+import base64
+import os
+import time
+import cv2
+import numpy as np
+
+
+class FrameSource(abc.ABC):
+    """
+    Something FrameCapturer can pull full frames from.
+
+    `read` follows cv2.VideoCapture.read: it returns (ok, frame) and may fill `dst`
+    in place. `live` sources produce frames on their own clock, so FrameCapturer
+    drains them on its background thread; non-live sources hand out every frame
+    and are better read synchronously (e.g. replaying a recording as fast as possible).
+    `exhausted` turns True once a recording has played to the end and won't produce
+    another frame.
+    """
+    live = False
+    exhausted = False
+
+    @abc.abstractmethod
+    def read(self, dst=None):
+        """Return (ok, frame), reading into `dst` where the frame fits."""
+
+    def set_buffer_size(self, size):
+        """Limit how many frames the source queues up; a no-op where that doesn't apply."""
+
+    def release(self):
+        pass
+
+
+class CameraSource(FrameSource):
+    """A capture card or webcam through cv2.VideoCapture."""
+    live = True
+
+    def __init__(self, camera_index=8, width=1920, height=1080):
+        self.camera_index = camera_index
+        self.cap = cv2.VideoCapture(camera_index)
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+
+    def read(self, dst=None):
+        return self.cap.read(dst)
+
+    def set_buffer_size(self, size):
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, size)
+
+    def release(self):
+        if self.cap.isOpened():
+            self.cap.release()
+
+
+class _Pacer:
+    """Sleeps so frames come out at `rate` times their recorded speed (rate None = no pacing)."""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.reset()
+
+    def reset(self):
+        self._wall_start = None
+        self._media_start = None
+
+    def wait(self, media_seconds):
+        if not self.rate:
+            return
+        now = time.perf_counter()
+        if self._wall_start is None:
+            self._wall_start, self._media_start = now, media_seconds
+            return
+        delay = self._wall_start + (media_seconds - self._media_start) / self.rate - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+class VideoFileSource(FrameSource):
+    """
+    Replays a recorded session (e.g. an MP4 of the broker screen).
+
+    :param rate: Playback speed relative to the recording (1.0 = real time, 4.0 = 4x);
+                 None reads frames as fast as they decode.
+    :param start: Position to start from, in seconds.
+    :param loop: Start over at the end instead of reporting end-of-stream.
+    """
+
+    def __init__(self, path, rate=1.0, start=0.0, loop=False):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Video file not found: {path}")
+        self.path = path
+        self.loop = loop
+        self.live = bool(rate)
+        self.cap = cv2.VideoCapture(path)
+        self.pacer = _Pacer(rate)
+        if start:
+            self.seek(start)
+
+    @property
+    def position(self):
+        """Current position in seconds."""
+        return self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+
+    def seek(self, seconds):
+        self.cap.set(cv2.CAP_PROP_POS_MSEC, seconds * 1000.0)
+        self.pacer.reset()
+        self.exhausted = False
+
+    def read(self, dst=None):
+        ok, frame = self.cap.read(dst)
+        if not ok and self.loop:
+            self.seek(0)
+            ok, frame = self.cap.read(dst)
+        if ok:
+            self.pacer.wait(self.position)
+        elif not self.loop:
+            self.exhausted = True
+        return ok, frame
+
+    def release(self):
+        if self.cap.isOpened():
+            self.cap.release()
+
+
+class ImageDirectorySource(FrameSource):
+    """
+    Plays back a directory of PNG/JPEG frames in filename order.
+
+    :param fps: Frames per second to pace playback at; None reads them as fast as they load.
+    :param loop: Start over after the last image instead of reporting end-of-stream.
+    """
+    extensions = ('.png', '.jpg', '.jpeg')
+
+    def __init__(self, path, fps=None, loop=False):
+        self.paths = sorted(
+            os.path.join(path, name) for name in os.listdir(path)
+            if name.lower().endswith(self.extensions)
+        )
+        if not self.paths:
+            raise FileNotFoundError(f"No PNG/JPEG frames found in {path}")
+        self.fps = fps
+        self.loop = loop
+        self.live = bool(fps)
+        self.index = 0
+        self.pacer = _Pacer(1.0 if fps else None)
+
+    def seek(self, index):
+        self.index = index
+        self.pacer.reset()
+        self.exhausted = False
+
+    def read(self, dst=None):
+        if self.index >= len(self.paths):
+            if not self.loop:
+                self.exhausted = True
+                return False, None
+            self.seek(0)
+
+        frame = cv2.imread(self.paths[self.index])
+        if frame is None:
+            self.index += 1
+            return False, None
+        if dst is not None and dst.shape == frame.shape:
+            np.copyto(dst, frame)
+            frame = dst
+
+        if self.fps:
+            self.pacer.wait(self.index / self.fps)
+        self.index += 1
+        return True, frame
+
+
+class ObsScreenshotSource(FrameSource):
+    """
+    Pulls frames from an OBS source with GetSourceScreenshot over the existing ObsClient,
+    for machines without the capture card.
+    """
+    live = True
+
+    def __init__(self, obs_client, source_name, width=1920, height=1080, image_format='png'):
+        self.obs_client = obs_client
+        self.source_name = source_name
+        self.width = width
+        self.height = height
+        self.image_format = image_format
+
+    def read(self, dst=None):
+        if not self.obs_client or not self.obs_client.connected:
+            time.sleep(0.1)
+            return False, None
+
+        response = self.obs_client._send_request_internal("GetSourceScreenshot", {
+            "sourceName": self.source_name,
+            "imageFormat": self.image_format,
+            "imageWidth": self.width,
+            "imageHeight": self.height,
+        })
+        if not response or 'imageData' not in response:
+            return False, None
+
+        # imageData is a data URI: "data:image/png;base64,...."
+        encoded = response['imageData'].split(',', 1)[-1]
+        buffer = np.frombuffer(base64.b64decode(encoded), dtype=np.uint8)
+        frame = cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+        if frame is None:
+            return False, None
+        if dst is not None and dst.shape == frame.shape:
+            np.copyto(dst, frame)
+            frame = dst
+        return True, frame
+
+
+def create_frame_source(spec, obs_client=None, rate=1.0, width=1920, height=1080):
+    """
+    Build a frame source from a "kind:target" spec, e.g. from the FRAME_SOURCE env var.
+
+        camera:8                    capture card at index 8 (the default)
+        video:/path/session.mp4     recorded session, played at `rate` (0 = as fast as possible)
+        images:/path/frames         directory of PNG/JPEG frames, at 30 fps * `rate` (0 = as fast as possible)
+        obs:Broker Capture          screenshots of an OBS source
+    """
+    kind, _, target = (spec or 'camera:8').partition(':')
+    rate = rate or None
+    if kind == 'camera':
+        return CameraSource(int(target or 8), width, height)
+    if kind == 'video':
+        return VideoFileSource(target, rate=rate)
+    if kind == 'images':
+        return ImageDirectorySource(target, fps=30 * rate if rate else None)
+    if kind == 'obs':
+        return ObsScreenshotSource(obs_client, target, width, height)
+    raise ValueError(f"Unknown frame source '{spec}'")
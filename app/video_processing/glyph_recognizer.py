@@ -0,0 +1,197 @@
+# app/video_processing/glyph_recognizer.py
+import threading
+import cv2
+import numpy as np
+
+
+def _runs(mask):
+    """Return (start, end) index pairs of the consecutive True runs in a 1-D bool array."""
+    padded = np.concatenate(([0], mask.astype(np.int8), [0]))
+    edges = np.flatnonzero(np.diff(padded))
+    return list(zip(edges[::2], edges[1::2]))
+
+
+class GlyphRecognizer:
+    """
+    Template-matching OCR for panels drawn in one fixed font (digits and a few symbols).
+
+    Works on a preprocessed image (dark text on a light background). Lines are found
+    from the row projection and characters from the column projection of each line;
+    every character is normalized against the line's baseline and digit height into a
+    fixed-size vector and matched against all templates at once with a single matrix
+    product (normalized correlation).
+
+    There are no built-in templates: `learn` harvests them from images Tesseract has
+    already read, so the recognizer starts answering once it has seen each character.
+    A harvested glyph that confidently matches a template for a different character is
+    taken as a Tesseract misread (8 for 3, 5 for 6) and dropped.
+    `recognize` returns None whenever a character matches poorly, which the caller
+    treats as "ask Tesseract".
+    """
+
+    def __init__(self, min_confidence=0.9, glyph_size=16, max_samples_per_char=8,
+                 min_line_height=6, space_ratio=0.35):
+        self.min_confidence = min_confidence
+        self.glyph_size = glyph_size
+        self.max_samples_per_char = max_samples_per_char
+        self.min_line_height = min_line_height
+        self.space_ratio = space_ratio
+        self._lock = threading.Lock()
+        self._templates = np.empty((0, 2 * glyph_size * ((3 * glyph_size) // 2)), dtype=np.float32)
+        self._labels = []
+        self.last_confidence = None
+        self.stats = {'recognized': 0, 'fallbacks': 0, 'learned': 0, 'conflicts': 0}
+
+    def _segment(self, image):
+        """
+        Split an image into glyph vectors.
+
+        :return: (vectors, layout) where `vectors` is an (n_glyphs, dim) array of
+                 zero-mean unit vectors in reading order and `layout` holds, per line,
+                 a list of "space before this glyph" flags.
+        """
+        ink = np.asarray(image) < 128
+        size = self.glyph_size
+        canvas_height, canvas_width = 2 * size, (3 * size) // 2
+        baseline_row = (3 * size) // 2
+
+        canvases = []
+        layout = []
+        for top, bottom in _runs(ink.any(axis=1)):
+            if bottom - top < self.min_line_height:
+                continue
+            line = ink[top:bottom]
+            columns = np.array(_runs(line.any(axis=0)))
+
+            # Rows covered by each glyph, for all glyphs at once: (line height, n_glyphs)
+            glyph_rows = np.logical_or.reduceat(line, columns[:, 0], axis=1)
+            tops = glyph_rows.argmax(axis=0)
+            bottoms = line.shape[0] - glyph_rows[::-1].argmax(axis=0)
+
+            # Digits dominate every line, so the median glyph bottom is the baseline
+            # and the median glyph height is the digit height
+            baseline = float(np.median(bottoms))
+            digit_height = max(float(np.median(bottoms - tops)), 1.0)
+            scale = size / digit_height
+            gaps = np.diff(columns[:, 0]) - (columns[:-1, 1] - columns[:-1, 0])
+            spaces = [False] + list(gaps > self.space_ratio * digit_height)
+
+            line_pixels = line.astype(np.float32)
+            for (left, right), glyph_top, glyph_bottom in zip(columns, tops, bottoms):
+                canvases.append(self._draw(
+                    line_pixels[glyph_top:glyph_bottom, left:right],
+                    baseline_row + round((glyph_bottom - baseline) * scale),
+                    scale, canvas_height, canvas_width
+                ))
+            layout.append(spaces)
+
+        if not canvases:
+            return np.empty((0, self._templates.shape[1]), dtype=np.float32), layout
+
+        vectors = np.stack(canvases).reshape(len(canvases), -1)
+        vectors -= vectors.mean(axis=1, keepdims=True)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms, layout
+
+    @staticmethod
+    def _draw(glyph, bottom, scale, canvas_height, canvas_width):
+        """
+        Draw a tightly cropped glyph onto a fixed canvas, scaled so digits are the
+        same height everywhere and with its bottom edge at `bottom` (relative to the
+        baseline, which is what tells '.', ',' and '-' apart).
+        """
+        height, width = glyph.shape
+        scaled_width = min(canvas_width, max(1, round(width * scale)))
+        scaled_height = min(canvas_height, max(1, round(height * scale)))
+        scaled = cv2.resize(glyph, (scaled_width, scaled_height), interpolation=cv2.INTER_AREA)
+
+        bottom = min(max(bottom, scaled_height), canvas_height)
+        left = (canvas_width - scaled_width) // 2
+        canvas = np.zeros((canvas_height, canvas_width), dtype=np.float32)
+        canvas[bottom - scaled_height:bottom, left:left + scaled_width] = scaled
+        return canvas
+
+    def recognize(self, image):
+        """Return the text in `image`, one line per row of glyphs, or None if any glyph matched poorly."""
+        vectors, layout = self._segment(image)
+        with self._lock:
+            templates, labels = self._templates, list(self._labels)
+
+        if not len(vectors) or not labels:
+            self.last_confidence = 0.0
+            self.stats['fallbacks'] += 1
+            return None
+
+        scores = vectors @ templates.T
+        best = scores.argmax(axis=1)
+        confidence = float(scores[np.arange(len(vectors)), best].min())
+        self.last_confidence = confidence
+        if confidence < self.min_confidence:
+            self.stats['fallbacks'] += 1
+            return None
+
+        text_lines = []
+        index = 0
+        for spaces in layout:
+            chars = []
+            for space_before in spaces:
+                if space_before:
+                    chars.append(' ')
+                chars.append(labels[best[index]])
+                index += 1
+            text_lines.append(''.join(chars))
+
+        self.stats['recognized'] += 1
+        return '\n'.join(text_lines) + '\n'
+
+    def learn(self, image, text):
+        """
+        Harvest templates from an image whose text is known (e.g. from Tesseract).
+
+        Only lines whose glyph count matches the text exactly are used, so a misread or
+        merged glyph can't poison the templates; a same-length misread is caught by
+        glyphs that already match another character's template.
+
+        :return: Number of templates added.
+        """
+        vectors, layout = self._segment(image)
+        text_lines = [line.replace(' ', '') for line in text.split('\n') if line.strip()]
+        if len(layout) != len(text_lines):
+            return 0
+
+        added = conflicts = 0
+        with self._lock:
+            templates, labels = self._templates, list(self._labels)
+            start = 0
+            for spaces, chars in zip(layout, text_lines):
+                line_vectors = vectors[start:start + len(spaces)]
+                start += len(spaces)
+                if len(line_vectors) != len(chars):
+                    continue
+                for vector, char in zip(line_vectors, chars):
+                    if labels:
+                        scores = templates @ vector
+                        best = int(scores.argmax())
+                        # `recognize` would confidently read this glyph as something else
+                        if labels[best] != char and float(scores[best]) >= self.min_confidence:
+                            conflicts += 1
+                            continue
+                    same_char = [i for i, label in enumerate(labels) if label == char]
+                    if len(same_char) >= self.max_samples_per_char:
+                        continue
+                    # Skip near-duplicates of a template we already have for this character
+                    if same_char and float((templates[same_char] @ vector).max()) > 0.98:
+                        continue
+                    templates = np.vstack([templates, vector[np.newaxis, :]])
+                    labels.append(char)
+                    added += 1
+            self._templates, self._labels = templates, labels
+
+        self.stats['learned'] += added
+        self.stats['conflicts'] += conflicts
+        return added
+
+    def known_characters(self):
+        with self._lock:
+            return set(self._labels)
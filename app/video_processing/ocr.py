@@ -0,0 +1,118 @@
+# app/video_processing/ocr.py
+from app.video_processing import ocr_engine
+from app.video_processing.ocr_cache import OcrCache
+from app.video_processing.preprocessing import preprocessor
+from app.video_processing.ocr_executor import FATAL_OCR_ERRORS
+from app.utils.metrics import stage_seconds, region_events
+
+# Shared across regions; each region gets its own namespace inside the cache
+ocr_cache = OcrCache(max_entries=512)
+
+
+def _cache_key(image, profile, config):
+    # Keyed on the preprocessed image, so capture noise that binarizes away still hits
+    return ocr_cache.image_key(image, f"{profile}|{config}")
+
+
+def _preprocess(crop, profile, region):
+    if profile is None:
+        return crop
+    with stage_seconds.time(stage='preprocess', region=region):
+        return preprocessor.run(crop, profile, region=region)
+
+
+def image_to_string(image, region, config='', profile=None):
+    """
+    OCR an image, answering from the LRU cache when the preprocessed image was read before.
+
+    :param image: The (cropped) image to read.
+    :param region: Region name used as the cache namespace, e.g. 'account'.
+    :param config: Extra Tesseract command-line config, e.g. '--psm 6'.
+    :param profile: Preprocessing profile to apply first; None reads the image as-is.
+    """
+    image = _preprocess(image, profile, region)
+    key = _cache_key(image, profile, config)
+    text = ocr_cache.get(region, key)
+    if text is not None:
+        region_events.inc(region=region, event='cache_hit')
+        return text
+
+    with stage_seconds.time(stage='ocr', region=region):
+        text = ocr_engine.image_to_string(image, config=config)
+    region_events.inc(region=region, event='tesseract')
+    ocr_cache.put(region, key, text)
+    return text
+
+
+def recognize_regions(jobs, executor=None, recognizers=None, frame_ref=None, rects=None):
+    """
+    OCR several regions, yielding (region, text) as each one finishes.
+
+    Regions read in this thread (all of them without an executor, and those with a
+    fast-path recognizer such as a GlyphRecognizer) are preprocessed here and looked up
+    in the cache first, then tried with their recognizer. Hits are yielded straight away.
+    Everything else is preprocessed, looked up and read concurrently on `executor` (an
+    OcrExecutor, whose workers keep their own caches), or serially in this thread when no
+    executor is given, and each Tesseract read is fed back to the region's recognizer as
+    training data. A region whose read failed is yielded with None (and nothing is cached
+    for it); FATAL_OCR_ERRORS are raised.
+
+    :param jobs: Dict of region name -> (crop, profile, config); a profile of None
+                 means the crop is already preprocessed.
+    :param recognizers: Optional dict of region name -> fast-path recognizer.
+    :param frame_ref: FrameRef from a shared frame ring that the crops were cut from;
+                      the executor then sends workers the slot and rectangle instead of pixels.
+    :param rects: Dict of region name -> (x1, y1, x2, y2), required with `frame_ref`.
+    """
+    recognizers = recognizers or {}
+    hits = {}
+    misses = {}
+    images = {}
+    keys = {}
+    for region, (crop, profile, config) in jobs.items():
+        if executor is None or region in recognizers:
+            images[region] = _preprocess(crop, profile, region)
+            keys[region] = _cache_key(images[region], profile, config)
+            text = ocr_cache.get(region, keys[region])
+            event = 'cache_hit'
+            if text is None and region in recognizers:
+                # The recognizer reads (and learns from) the preprocessed image
+                text = recognizers[region].recognize(images[region])
+                event = 'glyph_hit'
+            if text is not None:
+                region_events.inc(region=region, event=event)
+                hits[region] = text
+                continue
+        misses[region] = (crop, profile, config)
+
+    # Get the misses running before handing back the hits
+    results = None
+    if executor is not None and misses:
+        results = executor.map_regions(misses, frame_ref=frame_ref, rects=rects)
+
+    yield from hits.items()
+
+    if results is None:
+        def read_serially():
+            for region, (_, _, config) in misses.items():
+                try:
+                    text = ocr_engine.image_to_string(images[region], config=config)
+                except FATAL_OCR_ERRORS:
+                    raise
+                except Exception as e:
+                    print(f"OCR failed for region '{region}': {e}")
+                    text = None
+                yield region, text, False
+        results = read_serially()
+
+    for region, text, cached in results:
+        if text is None:
+            region_events.inc(region=region, event='error')
+            yield region, None
+            continue
+        region_events.inc(region=region, event='cache_hit' if cached else 'tesseract')
+        if region in keys:
+            ocr_cache.put(region, keys[region], text)
+        if region in recognizers and not cached:
+            recognizers[region].learn(images[region], text)
+        yield region, text
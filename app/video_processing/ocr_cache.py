@@ -0,0 +1,77 @@
+# app/video_processing/ocr_cache.py
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+
+
+class OcrCache:
+    """
+    Bounded LRU cache of OCR results keyed by a hash of the image handed to Tesseract.
+
+    Entries are namespaced per region, so identical pixels in two regions (which may
+    use different Tesseract configs) never share a result. The size limit is global
+    across regions; the least recently used entry is evicted first.
+    """
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._stats = {}
+
+    @staticmethod
+    def image_key(image, config=''):
+        """Fast content hash of an image (plus the OCR config that will read it)."""
+        image = np.ascontiguousarray(image)
+        digest = hashlib.blake2b(memoryview(image).cast('B'), digest_size=16)
+        digest.update(repr((image.shape, image.dtype.str, config)).encode())
+        return digest.digest()
+
+    def _region_stats(self, region):
+        return self._stats.setdefault(region, {'hits': 0, 'misses': 0, 'evictions': 0})
+
+    def get(self, region, key):
+        """Return the cached text for `key` in `region`, or None on a miss."""
+        with self._lock:
+            stats = self._region_stats(region)
+            text = self._entries.get((region, key))
+            if text is None:
+                stats['misses'] += 1
+                return None
+            self._entries.move_to_end((region, key))
+            stats['hits'] += 1
+            return text
+
+    def put(self, region, key, text):
+        """Store `text` for `key` in `region`, evicting the oldest entries past the size limit."""
+        with self._lock:
+            self._entries[(region, key)] = text
+            self._entries.move_to_end((region, key))
+            while len(self._entries) > self.max_entries:
+                (evicted_region, _), _ = self._entries.popitem(last=False)
+                self._region_stats(evicted_region)['evictions'] += 1
+
+    def clear(self, region=None):
+        """Drop every entry, or only those belonging to `region`."""
+        with self._lock:
+            if region is None:
+                self._entries.clear()
+                return
+            for entry_key in [k for k in self._entries if k[0] == region]:
+                del self._entries[entry_key]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def get_stats(self):
+        """Return {region: {'hits', 'misses', 'evictions', 'size'}} counters."""
+        with self._lock:
+            sizes = {}
+            for region, _ in self._entries:
+                sizes[region] = sizes.get(region, 0) + 1
+            return {
+                region: dict(stats, size=sizes.get(region, 0))
+                for region, stats in self._stats.items()
+            }
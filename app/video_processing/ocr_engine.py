@@ -0,0 +1,77 @@
+# app/video_processing/ocr_engine.py
+import shlex
+import threading
+import numpy as np
+import pytesseract
+
+try:
+    import tesserocr
+    tesserocr_available = True
+except ImportError:
+    tesserocr_available = False
+
+# tesserocr handles aren't thread-safe, so each thread (and each OCR worker
+# process) keeps its own, one per Tesseract config.
+_local = threading.local()
+
+
+def parse_config(config):
+    """
+    Split a pytesseract-style config string into (psm, variables).
+
+    '--psm 6 -c tessedit_char_whitelist=0123' -> (6, {'tessedit_char_whitelist': '0123'})
+    """
+    psm = None
+    variables = {}
+    tokens = shlex.split(config or '')
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token == '--psm' and i + 1 < len(tokens):
+            psm = int(tokens[i + 1])
+            i += 1
+        elif token == '-c' and i + 1 < len(tokens):
+            name, _, value = tokens[i + 1].partition('=')
+            variables[name] = value
+            i += 1
+        i += 1
+    return psm, variables
+
+
+class TesseractEngine:
+    """A warm in-process Tesseract API handle, configured once and reused for every call."""
+
+    def __init__(self, config='', lang='eng'):
+        psm, variables = parse_config(config)
+        # pytesseract defaults to PSM 3; tesserocr would otherwise default to 6
+        self.api = tesserocr.PyTessBaseAPI(lang=lang, psm=psm if psm is not None else tesserocr.PSM.AUTO)
+        for name, value in variables.items():
+            self.api.SetVariable(name, value)
+
+    def image_to_string(self, image):
+        image = np.ascontiguousarray(image)
+        height, width = image.shape[:2]
+        bytes_per_pixel = 1 if image.ndim == 2 else image.shape[2]
+        self.api.SetImageBytes(image.tobytes(), width, height, bytes_per_pixel, width * bytes_per_pixel)
+        return self.api.GetUTF8Text()
+
+    def close(self):
+        self.api.End()
+
+
+def get_engine(config=''):
+    """Return this thread's engine for `config`, creating it on first use."""
+    engines = getattr(_local, 'engines', None)
+    if engines is None:
+        engines = _local.engines = {}
+    engine = engines.get(config)
+    if engine is None:
+        engine = engines[config] = TesseractEngine(config)
+    return engine
+
+
+def image_to_string(image, config=''):
+    """OCR an image with the warm tesserocr engine, or pytesseract when the bindings aren't installed."""
+    if tesserocr_available:
+        return get_engine(config).image_to_string(image)
+    return pytesseract.image_to_string(image, config=config)
@@ -0,0 +1,127 @@
+# app/video_processing/ocr_executor.py
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pytesseract
+from app.video_processing import ocr_engine
+from app.video_processing.frame_ring import attach_crop
+from app.video_processing.ocr_cache import OcrCache
+from app.video_processing.preprocessing import preprocessor
+
+# Keep this module light: worker processes are spawned and import it on startup.
+
+# Tesseract missing or broken: retrying won't help, so these end the OCR loop instead
+# of failing one region
+FATAL_OCR_ERRORS = (pytesseract.TesseractError, pytesseract.TesseractNotFoundError)
+
+
+def default_worker_count():
+    """Half of the cores (at least one), leaving the rest for OBS encoding."""
+    return max(1, (os.cpu_count() or 2) // 2)
+
+
+def _run_ocr(image, config):
+    try:
+        return ocr_engine.image_to_string(image, config=config)
+    except pytesseract.TesseractNotFoundError as e:
+        # This one can't be pickled back to the parent, which would break the whole pool
+        raise pytesseract.TesseractError(-1, str(e))
+
+
+# Each worker process caches what it read, keyed on the preprocessed image
+worker_cache = OcrCache(max_entries=512)
+
+
+def _run_region_ocr(crop, profile, config, region):
+    """
+    Preprocess and OCR one region; `crop` is an image or a shared frame descriptor.
+
+    :return: (text, True if it came from this worker's cache).
+    """
+    if isinstance(crop, tuple):
+        crop = attach_crop(crop)
+    image = crop if profile is None else preprocessor.run(crop, profile, region=region)
+    key = OcrCache.image_key(image, f"{profile}|{config}")
+    text = worker_cache.get(region, key)
+    if text is not None:
+        return text, True
+    text = _run_ocr(image, config)
+    worker_cache.put(region, key, text)
+    return text, False
+
+
+class OcrExecutor:
+    """Runs Tesseract for several regions at once on a pool of worker processes."""
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or default_worker_count()
+        # spawn rather than fork: the parent is full of threads (OBS client, Flask, capture)
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context('spawn')
+        )
+
+    def submit(self, image, config=''):
+        """Queue one OCR job and return its Future."""
+        return self._pool.submit(_run_ocr, image, config)
+
+    def submit_region(self, region, crop, profile=None, config='', frame_ref=None, rect=None):
+        """
+        Queue preprocessing plus OCR of one region and return its Future, which resolves
+        to (text, cached).
+
+        With `frame_ref` (a FrameRef from the capturer's shared frame ring) and the region's
+        `rect`, only the slot index and rectangle are sent; the worker crops the frame
+        straight out of shared memory. The slot stays referenced until the job finishes.
+        Otherwise the crop itself is pickled across.
+        """
+        if frame_ref is None:
+            return self._pool.submit(_run_region_ocr, crop, profile, config, region)
+
+        job_ref = frame_ref.retain()
+        try:
+            future = self._pool.submit(_run_region_ocr, job_ref.descriptor(rect), profile, config, region)
+        except Exception:
+            job_ref.release()
+            raise
+        future.add_done_callback(lambda _: job_ref.release())
+        return future
+
+    def map_regions(self, jobs, frame_ref=None, rects=None):
+        """
+        Submit every region at once and return a generator of results in completion order.
+
+        Submission happens immediately, before the generator is first advanced.
+
+        :param jobs: Dict of region name -> (crop, profile, config).
+        :param frame_ref: FrameRef the crops were cut from, to pass them through shared memory.
+        :param rects: Dict of region name -> (x1, y1, x2, y2) within that frame (needed with `frame_ref`).
+        :return: Generator of (region, text, cached) tuples; text is None if that region's job
+                 failed, and cached is True if a worker answered from its cache.
+        :raises TesseractError: From the generator, if Tesseract itself is unusable (see FATAL_OCR_ERRORS).
+        """
+        futures = {
+            self.submit_region(
+                region, crop, profile, config,
+                frame_ref=frame_ref, rect=rects[region] if frame_ref is not None else None
+            ): region
+            for region, (crop, profile, config) in jobs.items()
+        }
+        return _completed(futures)
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+
+def _completed(futures):
+    """(region, text, cached) per future as it finishes; a failed job gives None rather than ending the rest."""
+    for future in as_completed(futures):
+        region = futures[future]
+        try:
+            text, cached = future.result()
+        except FATAL_OCR_ERRORS:
+            raise
+        except Exception as e:
+            print(f"OCR failed for region '{region}': {e}")
+            text, cached = None, False
+        yield region, text, cached
@@ -2,8 +2,13 @@
 import os
 import re
 import json
+import time
 import pytesseract
-from app.config.globals import shutdown_event
+from app.video_processing import ocr
+from app.utils.metrics import stage_seconds, region_events, observe_overlay_latency
+from app.video_processing.overlay_state import overlay_state, output_sinks, obs_input_name
+from app.config.globals import shutdown_event, settings_manager
+from app.config import globals as app_globals
 from datetime import datetime
 
 # File paths
@@ -12,9 +17,10 @@ logs_dir = os.path.join(script_dir, 'logs')
 activity_file = os.path.join(logs_dir, 'activity.txt')
 
 last_order = None
+OCR_CONFIG = '--psm 6'
 
 def ensure_files_exist():
-    """Ensure the logs directory and activity.txt file exist"""
+    """Ensure the logs directory and activity.txt file exist. Called once at startup."""
     try:
         # Create logs directory if it doesn't exist
         if not os.path.exists(logs_dir):
@@ -59,8 +65,9 @@ def read_from_file(file_path):
 def write_to_file(file_path, content, mode='w'):
     """Write content to file with error handling"""
     try:
-        with open(file_path, mode) as f:
-            f.write(content)
+        with stage_seconds.time(stage='file_write', region='orders'):
+            with open(file_path, mode) as f:
+                f.write(content)
         return True
     except Exception as e:
         log_error(f"Error writing to {file_path}: {e}")
@@ -108,27 +115,33 @@ def find_nearest_order_line(existing_lines):
         log_error(f"Error finding nearest order line: {e}")
         return None
 
-def process_orders(cropped_frame):
+def process_orders(cropped_frame, extracted_text=None, captured_at=None):
+    """
+    OCR the order ticker region and log new orders to activity.txt.
+    Returns True when a new order (fill) was recorded.
+    """
     global last_order
     if shutdown_event.is_set():
         print("Process orders terminated due to shutdown signal.")
         return
 
     try:
-        # Ensure necessary files exist
-        ensure_files_exist()
-
         # Process the image
-        extracted_text = pytesseract.image_to_string(cropped_frame, config='--psm 6').strip()
+        if extracted_text is None:
+            extracted_text = ocr.image_to_string(cropped_frame, region='orders', config=OCR_CONFIG, profile='orders')
+        parse_start = time.perf_counter()
+        extracted_text = extracted_text.strip()
         
         # Validate the extracted text
         pattern = re.compile(r"([A-Z]{1,4}) (\$\d+(\.\d+)?)")
         match = pattern.match(extracted_text)
         if not match:
+            stage_seconds.observe(time.perf_counter() - parse_start, stage='parse', region='orders')
             return
 
         # Clean and process the text
         extracted_text = fix_order_errors(extracted_text)
+        stage_seconds.observe(time.perf_counter() - parse_start, stage='parse', region='orders')
         existing_text = read_from_file(activity_file).strip()
         existing_lines = existing_text.split('\n') if existing_text else []
 
@@ -162,8 +175,22 @@ def process_orders(cropped_frame):
         # Add new activity if needed
         if should_add_activity:
             last_order = 'reset'
+            # activity.txt is the order log (and what duplicates are checked against),
+            # so it is appended to whatever the overlay output is
             if not add_activity(extracted_text, 'order'):
                 log_error("Failed to add activity")
+                return False
+            to_file, to_obs = output_sinks(settings_manager.get_setting('overlay_output'))
+            if to_file:
+                observe_overlay_latency(captured_at, 'file')
+            # The OBS text input for the latest order comes from the 'obs_inputs' setting
+            input_name = obs_input_name(settings_manager, 'orders')
+            if to_obs and input_name and app_globals.obs_client is not None:
+                try:
+                    overlay_state.update_source(app_globals.obs_client, input_name, {"text": extracted_text}, captured_at, region='orders')
+                except Exception as e:
+                    log_error(f"Error setting source text for {input_name}: {e}")
+            return True
 
     except KeyboardInterrupt:
         print("Keyboard Interrupt in process_orders.")
@@ -172,4 +199,5 @@ def process_orders(cropped_frame):
         log_error(f"Tesseract Error: {e}")
         shutdown_event.set()
     except Exception as e:
+        region_events.inc(region='orders', event='error')
         log_error(f"General error in process_orders: {e}")
\ No newline at end of file
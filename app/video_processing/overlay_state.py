@@ -0,0 +1,224 @@
+# app/video_processing/overlay_state.py
+import os
+import tempfile
+import threading
+import time
+from app.utils.metrics import registry, stage_seconds, observe_overlay_latency
+
+# Where overlay values go (the 'overlay_output' setting):
+#   file: logs/*.txt files that OBS text sources read from disk (the original setup)
+#   obs:  straight into the OBS text inputs with SetInputSettings; shows on the next OBS frame
+#   both: both of the above
+OUTPUT_MODES = ('file', 'obs', 'both')
+
+
+def output_sinks(mode):
+    """(write files, update OBS inputs) for an output mode; unknown modes fall back to 'file'."""
+    if mode not in OUTPUT_MODES:
+        mode = 'file'
+    return mode in ('file', 'both'), mode in ('obs', 'both')
+
+
+# Values that can go straight into an OBS text input, and how the settings page labels
+# them; the 'obs_inputs' setting maps each to the name of the input in the user's scene
+OBS_INPUT_LABELS = {
+    'totalAccountValue': "Total Account Value",
+    'marketValue': "Market Value",
+    'buyingPower': "Buying Power",
+    'optionsBP': "Options BP",
+    'orders': "Last Order",
+    'chart': "Chart Title",
+}
+
+
+def obs_input_name(settings_manager, key):
+    """Name of the OBS text input configured to show `key`, or None if there isn't one."""
+    return (settings_manager.get_setting('obs_inputs') or {}).get(key) or None
+
+overlay_updates = registry.counter(
+    'overlay_updates_total', "Overlay text file writes and OBS source updates", ('kind', 'result')
+)
+
+
+class OverlayState:
+    """
+    The last value published to each overlay text file and OBS source setting.
+
+    Writes and OBS requests are only let through when the value actually changed, so a
+    steady P/L costs no disk I/O and no OBS traffic. Text files are replaced atomically
+    (temp file + rename) so OBS never reads a half-written value. An input OBS refuses
+    to update (usually because the scene has no input by that name) is left alone for
+    `retry_interval` seconds, or until OBS reconnects, rather than being sent every tick.
+    """
+
+    def __init__(self, retry_interval=30.0):
+        self.retry_interval = retry_interval
+        self._lock = threading.Lock()
+        self._files = {}
+        self._sources = {}
+        # input name -> time.monotonic() when OBS last refused an update to it
+        self._failed_inputs = {}
+        self.stats = {'writes': 0, 'suppressed_writes': 0, 'obs_requests': 0, 'suppressed_obs_requests': 0}
+
+    def ensure_file(self, file_path, default=""):
+        """Create a file if it's missing and remember its current contents; meant for startup."""
+        directory = os.path.dirname(file_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        if not os.path.exists(file_path):
+            with open(file_path, 'w') as f:
+                f.write(default)
+
+        with open(file_path, 'r') as f:
+            content = f.read()
+        with self._lock:
+            self._files[file_path] = content
+
+    def write_text(self, file_path, content):
+        """
+        Replace a file's contents unless they're already `content`.
+
+        :return: True if the file was written, False if the write was suppressed.
+        :raises OSError: If the write failed; the file is then treated as unknown.
+        """
+        with self._lock:
+            if self._files.get(file_path) == content:
+                self.stats['suppressed_writes'] += 1
+                overlay_updates.inc(kind='file', result='suppressed')
+                return False
+            # Forget the old value first so a failed write is retried next time
+            self._files.pop(file_path, None)
+
+            _atomic_write(file_path, content)
+            self._files[file_path] = content
+            self.stats['writes'] += 1
+        overlay_updates.inc(kind='file', result='written')
+        return True
+
+    def read_text(self, file_path):
+        """Last content published to (or loaded from) a file, reading it from disk if unknown."""
+        with self._lock:
+            if file_path in self._files:
+                return self._files[file_path]
+        if not os.path.exists(file_path):
+            return ""
+        with open(file_path, 'r') as f:
+            content = f.read()
+        with self._lock:
+            return self._files.setdefault(file_path, content)
+
+    def claim_source_update(self, input_name, settings):
+        """
+        Decide whether an OBS input needs `settings` sent, recording them as published if so.
+
+        :return: True if the caller should send the request, False if OBS already has these values.
+        """
+        key = tuple(sorted(settings.items()))
+        with self._lock:
+            failed_at = self._failed_inputs.get(input_name)
+            if failed_at is not None:
+                if time.monotonic() - failed_at < self.retry_interval:
+                    overlay_updates.inc(kind='obs', result='unavailable')
+                    return False
+                del self._failed_inputs[input_name]
+            if self._sources.get(input_name) == key:
+                self.stats['suppressed_obs_requests'] += 1
+                overlay_updates.inc(kind='obs', result='suppressed')
+                return False
+            self._sources[input_name] = key
+            self.stats['obs_requests'] += 1
+        overlay_updates.inc(kind='obs', result='sent')
+        return True
+
+    def update_source(self, obs_client, input_name, settings, captured_at=None, region=None):
+        """
+        Send SetInputSettings with `settings` (e.g. {"text": ..., "color": ...}) in one request,
+        unless the input already has exactly these values.
+
+        A failed request forgets the input so the next update goes out again; if OBS refused
+        it (e.g. there's no input by that name), further updates to the input are held back
+        for `retry_interval`. A successful one records capture-to-overlay latency when
+        `captured_at` is given, and the time from queueing the request to OBS answering it
+        as the `region`'s obs_request stage.
+
+        :return: True if a request was queued.
+        """
+        if not self.claim_source_update(input_name, settings):
+            return False
+
+        queued_at = time.perf_counter()
+
+        def on_error(status):
+            # None: OBS never answered (timeout, lost connection), so just send it again
+            if status is not None:
+                self.source_refused(input_name, status)
+
+        def on_response(response):
+            if response is None:
+                self.forget_source(input_name)
+                return
+            if region is not None:
+                stage_seconds.observe(time.perf_counter() - queued_at, stage='obs_request', region=region)
+            observe_overlay_latency(captured_at, 'obs')
+
+        try:
+            obs_client.send_request("SetInputSettings", {
+                "inputName": input_name,
+                "inputSettings": settings
+            }, callback=on_response, on_error=on_error)
+        except Exception:
+            self.forget_source(input_name)
+            raise
+        return True
+
+    def forget_source(self, input_name):
+        """Drop what we think an OBS input shows (e.g. its request failed), so the next update goes out."""
+        with self._lock:
+            self._sources.pop(input_name, None)
+
+    def source_refused(self, input_name, status):
+        """
+        OBS answered an update to `input_name` with a failed requestStatus: forget the input
+        and hold back updates to it for `retry_interval`.
+        """
+        with self._lock:
+            self._sources.pop(input_name, None)
+            reported = input_name in self._failed_inputs
+            self._failed_inputs[input_name] = time.monotonic()
+        if not reported:
+            reason = status.get('comment') or f"code {status.get('code')}"
+            print(f"OBS refused to update input '{input_name}' ({reason}); retrying in {self.retry_interval:.0f}s")
+
+    def on_obs_connection(self, connected):
+        """Connection callback: a (re)started OBS may show anything, so every input is sent afresh."""
+        if connected:
+            with self._lock:
+                self._sources.clear()
+                self._failed_inputs.clear()
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self.stats)
+
+
+def _atomic_write(file_path, content):
+    directory = os.path.dirname(file_path) or '.'
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.tmp_', suffix='.txt')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(content)
+        try:
+            os.replace(temp_path, file_path)
+        except PermissionError:
+            # Windows refuses the rename while OBS has the file open; write in place instead
+            with open(file_path, 'w') as f:
+                f.write(content)
+            os.remove(temp_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+# Shared by every handler so startup, stats and suppression cover all overlay files
+overlay_state = OverlayState()
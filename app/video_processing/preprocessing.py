@@ -0,0 +1,148 @@
+# app/video_processing/preprocessing.py
+import threading
+import time
+import cv2
+import numpy as np
+
+# Per-region preprocessing profiles.
+#   grayscale:    collapse BGR to a single channel before anything else
+#   invert:       True, False or 'auto' (invert when the crop is mostly dark, i.e. a dark theme)
+#   binarize:     None, 'adaptive' or 'otsu'
+#   block_size/c: adaptive threshold neighbourhood (odd) and offset
+#   glyph_height: approximate cap height of the text in the raw crop, in pixels
+#   target_glyph_height: height Tesseract reads best; the crop is upscaled by the nearest integer factor
+PROFILES = {
+    'account': {
+        'grayscale': True,
+        'invert': 'auto',
+        'binarize': 'adaptive',
+        'block_size': 31,
+        'c': 10,
+        'glyph_height': 14,
+        'target_glyph_height': 30,
+    },
+    'orders': {
+        'grayscale': True,
+        'invert': 'auto',
+        'binarize': 'otsu',
+        'glyph_height': 12,
+        'target_glyph_height': 30,
+    },
+    'chart': {
+        'grayscale': True,
+        'invert': 'auto',
+        'binarize': 'otsu',
+        'glyph_height': 16,
+        'target_glyph_height': 30,
+    },
+    'raw': {},
+}
+
+
+def scale_factor(profile):
+    """Integer upscale factor that brings the profile's glyphs closest to the target height."""
+    glyph_height = profile.get('glyph_height')
+    target = profile.get('target_glyph_height')
+    if not glyph_height or not target:
+        return 1
+    return max(1, round(target / glyph_height))
+
+
+class Preprocessor:
+    """
+    Turns a raw BGR region crop into the binarized single-channel image Tesseract reads best.
+
+    Works directly on views of the shared frame buffer and keeps per-region output
+    buffers, so steady-state preprocessing doesn't allocate. The buffers are per thread,
+    so the loop, the glyph fast path and the inline OCR path can share one instance;
+    the image returned by `run` is overwritten by the next call for the same region
+    on the same thread.
+    """
+
+    def __init__(self, profiles=None):
+        self.profiles = PROFILES if profiles is None else profiles
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._timings = {}
+
+    def _buffer(self, region, step, shape, dtype):
+        buffers = self._local.__dict__.setdefault('buffers', {})
+        key = (region, step)
+        buffer = buffers.get(key)
+        if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+            buffer = buffers[key] = np.empty(shape, dtype=dtype)
+        return buffer
+
+    def run(self, image, profile_name, region=None):
+        """
+        Preprocess `image` with the named profile.
+
+        :param region: Key for output buffers and timings; defaults to the profile name.
+        :return: The preprocessed image.
+        """
+        profile = self.profiles.get(profile_name, {})
+        region = region or profile_name
+        timings = {}
+
+        start = time.perf_counter()
+        if profile.get('grayscale') and image.ndim == 3:
+            gray = self._buffer(region, 'gray', image.shape[:2], image.dtype)
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, dst=gray)
+            timings['grayscale'] = time.perf_counter() - start
+
+        invert = profile.get('invert')
+        if invert == 'auto':
+            invert = image.mean() < 127
+        if invert:
+            step_start = time.perf_counter()
+            inverted = self._buffer(region, 'invert', image.shape, image.dtype)
+            image = cv2.bitwise_not(image, dst=inverted)
+            timings['invert'] = time.perf_counter() - step_start
+
+        factor = scale_factor(profile)
+        if factor > 1:
+            step_start = time.perf_counter()
+            scaled_shape = (image.shape[0] * factor, image.shape[1] * factor) + image.shape[2:]
+            scaled = self._buffer(region, 'scale', scaled_shape, image.dtype)
+            image = cv2.resize(image, (scaled_shape[1], scaled_shape[0]), dst=scaled, interpolation=cv2.INTER_CUBIC)
+            timings['rescale'] = time.perf_counter() - step_start
+
+        binarize = profile.get('binarize')
+        if binarize and image.ndim == 2:
+            step_start = time.perf_counter()
+            binary = self._buffer(region, 'binary', image.shape, image.dtype)
+            if binarize == 'adaptive':
+                image = cv2.adaptiveThreshold(
+                    image, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY,
+                    profile.get('block_size', 31), profile.get('c', 10), dst=binary
+                )
+            else:
+                _, image = cv2.threshold(image, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU, dst=binary)
+            timings['binarize'] = time.perf_counter() - step_start
+
+        timings['total'] = time.perf_counter() - start
+        self._record(region, timings)
+        return image
+
+    def _record(self, region, timings):
+        with self._lock:
+            totals = self._timings.setdefault(region, {'calls': 0})
+            totals['calls'] += 1
+            for step, seconds in timings.items():
+                totals[step] = totals.get(step, 0.0) + seconds
+
+    def get_timings(self):
+        """Return {region: {step: mean milliseconds, 'calls': n}}."""
+        with self._lock:
+            return {
+                region: dict(
+                    {step: round(seconds / totals['calls'] * 1000, 3)
+                     for step, seconds in totals.items() if step != 'calls'},
+                    calls=totals['calls']
+                )
+                for region, totals in self._timings.items()
+            }
+
+
+# Shared by the main loop and the inline OCR path in the process_* functions
+preprocessor = Preprocessor()
@@ -0,0 +1,126 @@
+# app/video_processing/regions.py
+import json
+import os
+import threading
+
+script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+default_regions_file = os.path.join(script_dir, 'config', 'regions.json')
+
+
+class Region:
+    """One screen region: where to crop it, how to OCR it and who handles the text."""
+
+    def __init__(self, name, rect, handler, psm=None, whitelist=None, profile=None,
+                 interval=0.3, max_interval=None, fast_path=None):
+        if len(rect) != 4 or rect[0] >= rect[2] or rect[1] >= rect[3]:
+            raise ValueError(f"Region '{name}' has an invalid rect {rect}; expected [x1, y1, x2, y2]")
+        if fast_path not in (None, 'glyph'):
+            raise ValueError(f"Region '{name}' has unknown fast_path '{fast_path}'")
+        if whitelist and any(ch.isspace() for ch in whitelist):
+            raise ValueError(f"Region '{name}' whitelist can't contain whitespace")
+
+        self.name = name
+        self.rect = tuple(int(v) for v in rect)
+        self.handler = handler
+        self.psm = psm
+        self.whitelist = whitelist
+        self.profile = profile
+        self.interval = interval
+        self.max_interval = max_interval or interval
+        self.fast_path = fast_path
+
+    @property
+    def ocr_config(self):
+        """Tesseract config string for this region, e.g. '--psm 6 -c tessedit_char_whitelist=0123'."""
+        parts = []
+        if self.psm is not None:
+            parts.append(f"--psm {self.psm}")
+        if self.whitelist:
+            parts.append(f"-c tessedit_char_whitelist={self.whitelist}")
+        return ' '.join(parts)
+
+    def __eq__(self, other):
+        return isinstance(other, Region) and vars(self) == vars(other)
+
+
+_NO_FAILURE = object()
+
+
+class RegionRegistry:
+    """
+    Screen regions loaded from a JSON config file.
+
+    Call `reload_if_changed` periodically to pick up edits without restarting; a file
+    that fails to parse or validate is reported and the previous regions are kept.
+    """
+
+    def __init__(self, handlers, path=default_regions_file):
+        self.handlers = handlers
+        self.path = path
+        self._lock = threading.Lock()
+        self._regions = {}
+        self._mtime = None
+        # mtime of a file version that failed to load (None if the file was missing),
+        # so each broken version is only reported once
+        self._failed_mtime = _NO_FAILURE
+        self.load()
+
+    def load(self):
+        """(Re)load the config file, replacing every region at once."""
+        mtime = os.path.getmtime(self.path)
+        with open(self.path, 'r') as f:
+            config = json.load(f)
+
+        regions = {}
+        for name, spec in config.get('regions', {}).items():
+            spec = dict(spec)
+            handler_name = spec.pop('handler', name)
+            if handler_name not in self.handlers:
+                raise ValueError(f"Region '{name}' uses unknown handler '{handler_name}'")
+            regions[name] = Region(name, handler=self.handlers[handler_name], **spec)
+
+        with self._lock:
+            self._regions = regions
+            self._mtime = mtime
+
+    def reload_if_changed(self):
+        """
+        Reload the config if the file changed since the last load.
+
+        :return: Set of region names that were added, removed or modified (empty if nothing changed).
+        """
+        mtime = None
+        try:
+            mtime = os.path.getmtime(self.path)
+            if mtime in (self._mtime, self._failed_mtime):
+                return set()
+            previous = self.regions()
+            self.load()
+        except Exception as e:
+            if mtime != self._failed_mtime:
+                print(f"Error reloading regions from {self.path}: {e}")
+            self._failed_mtime = mtime
+            return set()
+        self._failed_mtime = _NO_FAILURE
+
+        current = self.regions()
+        changed = {name for name in previous.keys() | current.keys() if previous.get(name) != current.get(name)}
+        if changed:
+            print(f"Reloaded regions from {self.path}; changed: {', '.join(sorted(changed))}")
+        return changed
+
+    def regions(self):
+        """Snapshot of {name: Region}."""
+        with self._lock:
+            return dict(self._regions)
+
+    def get(self, name):
+        with self._lock:
+            return self._regions.get(name)
+
+    def rects(self, names=None):
+        """{name: (x1, y1, x2, y2)} for the given region names (default: all)."""
+        with self._lock:
+            if names is None:
+                names = self._regions.keys()
+            return {name: self._regions[name].rect for name in names if name in self._regions}
@@ -0,0 +1,84 @@
+# app/video_processing/scheduler.py
+import threading
+import time
+
+
+class RegionScheduler:
+    """
+    Gives every region its own polling interval.
+
+    A region that keeps coming back unchanged backs off exponentially up to its
+    `max_interval`; as soon as it changes it snaps back to its base `interval`.
+    `boost` temporarily polls a region faster and ahead of the others, e.g. the
+    orders panel right after a fill.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._regions = {}
+
+    def add_region(self, name, interval, max_interval=None, backoff=2.0):
+        with self._lock:
+            self._regions[name] = {
+                'interval': interval,
+                'max_interval': max_interval or interval,
+                'backoff': backoff,
+                'current_interval': interval,
+                'next_due': 0.0,
+                'boost_interval': None,
+                'boost_until': 0.0,
+            }
+
+    def remove_region(self, name):
+        with self._lock:
+            self._regions.pop(name, None)
+
+    def _effective_interval(self, region, now):
+        if now < region['boost_until']:
+            return min(region['boost_interval'], region['current_interval'])
+        return region['current_interval']
+
+    def due_regions(self, now=None):
+        """Return the names of the regions due for polling, boosted regions first."""
+        now = time.time() if now is None else now
+        with self._lock:
+            due = [name for name, region in self._regions.items() if region['next_due'] <= now]
+            return sorted(due, key=lambda name: now >= self._regions[name]['boost_until'])
+
+    def report(self, name, changed, now=None):
+        """Record the outcome of polling `name` and schedule its next poll."""
+        now = time.time() if now is None else now
+        with self._lock:
+            region = self._regions[name]
+            if changed:
+                region['current_interval'] = region['interval']
+            else:
+                region['current_interval'] = min(
+                    region['current_interval'] * region['backoff'],
+                    region['max_interval']
+                )
+            region['next_due'] = now + self._effective_interval(region, now)
+
+    def boost(self, name, interval=0.1, duration=5.0, now=None):
+        """Poll `name` every `interval` seconds, ahead of other regions, for the next `duration` seconds."""
+        now = time.time() if now is None else now
+        with self._lock:
+            region = self._regions[name]
+            region['boost_interval'] = interval
+            region['boost_until'] = now + duration
+            region['next_due'] = min(region['next_due'], now + interval)
+
+    def time_until_next(self, now=None):
+        """Seconds until the next region falls due (0 if one already is; infinite without regions)."""
+        now = time.time() if now is None else now
+        with self._lock:
+            if not self._regions:
+                return float('inf')
+            next_due = min(region['next_due'] for region in self._regions.values())
+            return max(0.0, next_due - now)
+
+    def get_intervals(self):
+        """Return the interval each region is currently polled at."""
+        now = time.time()
+        with self._lock:
+            return {name: self._effective_interval(region, now) for name, region in self._regions.items()}
@@ -13,6 +13,7 @@ from app.services.transcription_service import (
 )
 from app.services.premiere_service import launch_premiere_and_import
 from app.video_processing.save_clips import save_replay
+from app.video_processing.overlay_state import OBS_INPUT_LABELS
 
 def process_replays_for_premiere():
     """
@@ -132,6 +133,10 @@ def initialize_routes(app, settings_manager, socketio):
             new_settings = {
                 'go_live': 'go_live' in request.form,  # handle the new go_live setting
                 'multiplier': int(request.form.get('multiplier', 1)),
+                'overlay_output': request.form.get('overlay_output', 'file'),
+                'obs_inputs': {
+                    key: request.form.get(f'obs_input_{key}', '').strip() for key in OBS_INPUT_LABELS
+                },
                 'alerts': 'alerts' in request.form,
                 'broadcastAlert': 'broadcastAlert' in request.form,
                 'subtitles': 'subtitles' in request.form,
@@ -148,6 +153,9 @@ def initialize_routes(app, settings_manager, socketio):
             current_settings = {
                 'go_live': settings_manager.get_setting('go_live'),  # handle the new go_live setting
                 'multiplier': int(request.form.get('multiplier', 1)),
+                'overlay_output': settings_manager.get_setting('overlay_output'),
+                'obs_inputs': settings_manager.get_setting('obs_inputs') or {},
+                'obs_input_labels': OBS_INPUT_LABELS,
                 'alerts': settings_manager.get_setting('alerts'),
                 'broadcastAlert': settings_manager.get_setting('broadcastAlert'),
                 'process': settings_manager.get_setting('process'),
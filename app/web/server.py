@@ -1,9 +1,10 @@
-from flask import Flask
+from flask import Flask, Response, jsonify
 from flask_cors import CORS
 from flask_socketio import SocketIO
 from threading import Thread, Event
 from app.config.globals import shutdown_event
 from app.utils.ports import is_port_in_use, wait_for_port_release, kill_process_on_port
+from app.utils import metrics
 import time
 import logging
 
@@ -18,6 +19,16 @@ socketio = None
 server_thread = None
 server_started = Event()
 
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus scrape target for the OCR loop's stage timings and counters."""
+    return Response(metrics.registry.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/v1/latency')
+def latency_endpoint():
+    """Live capture-to-overlay p50/p99 (ms) per sink over the most recent updates."""
+    return jsonify(metrics.latency_report())
+
 def initialize_socketio():
     global socketio
     if socketio is None:
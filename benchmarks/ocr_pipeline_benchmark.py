@@ -0,0 +1,283 @@
+# benchmarks/ocr_pipeline_benchmark.py
+"""
+Replay a corpus of captured broker frames through process_account, process_orders and
+process_chart with OBS and file writes stubbed out, and report per-stage latency,
+throughput, peak RSS and field-level accuracy as JSON.
+
+    python benchmarks/ocr_pipeline_benchmark.py benchmarks/corpus
+    python benchmarks/ocr_pipeline_benchmark.py benchmarks/corpus --warm-cache --glyph --output before.json
+
+The corpus is a directory of full 1920x1080 PNG/JPEG frames plus a labels.json of
+golden values keyed by file name. Every key is optional; only labelled fields are scored:
+
+    {
+        "0001.png": {
+            "account": {
+                "totalAccountValue": "25431.17",
+                "marketValue": "4120.00",
+                "buyingPower": "18002.55",
+                "optionsBP": "9001.10",
+                "openPL": {"amount": "+1,250.00", "percentage": "+12.50%"},
+                "daysPL": {"amount": "-310.25", "percentage": "-1.20%"}
+            },
+            "orders": "SPY $450 Call ...",
+            "chart": "SPDR S&P 500 ETF ( $SPY )"
+        }
+    }
+
+Account values are compared in the form process_account stores them (multiplier 1).
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+sys.path.append(project_root)
+
+from app.config.globals import obs_ready
+from app.video_processing import account_details, orders, charts, ocr
+from app.video_processing.capture import FrameCapturer
+from app.video_processing.frame_sources import ImageDirectorySource
+from app.video_processing.glyph_recognizer import GlyphRecognizer
+from app.video_processing.preprocessing import preprocessor
+from app.video_processing.regions import RegionRegistry
+
+STAGES = ('capture', 'preprocess', 'ocr', 'parse', 'sink')
+ACCOUNT_FIELDS = ('totalAccountValue', 'marketValue', 'buyingPower', 'optionsBP', 'openPL', 'daysPL')
+
+
+class StubObsClient:
+    """Accepts requests without a websocket; counts them so the sink can be inspected."""
+    connected = True
+
+    def __init__(self):
+        self.requests = 0
+
+    def send_request(self, request_type, request_data=None, callback=None, on_error=None):
+        self.requests += 1
+
+    def batch(self, execution_type=None, halt_on_failure=False):
+        # Batched requests are counted one by one
+        return contextlib.nullcontext(self)
+
+
+class MemoryFiles:
+    """In-memory stand-in for the overlay text files the process_* functions write."""
+
+    def __init__(self):
+        self.files = {}
+
+    def read(self, file_path):
+        return self.files.get(file_path, "")
+
+    def write(self, file_path, content, mode='w', captured_at=None):
+        if mode == 'a':
+            self.files[file_path] = self.files.get(file_path, "") + content
+        else:
+            self.files[file_path] = content
+        return True
+
+
+class SinkTimer:
+    """Wraps the sink functions (file writes, OBS requests) and accumulates their time."""
+
+    def __init__(self):
+        self.seconds = 0.0
+
+    def wrap(self, func):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.seconds += time.perf_counter() - start
+        return timed
+
+
+def install_stubs(memory_files, sink_timer):
+    obs_ready.set()
+    # Keep stray log files out of the repo
+    account_details.logs_dir = orders.logs_dir = charts.logs_dir = tempfile.mkdtemp(prefix='ocr_bench_')
+    account_details.ensure_files_exist = lambda: None
+    orders.ensure_files_exist = lambda: None
+    charts.ensure_files_exist = lambda: None
+
+    account_details.write_to_file = sink_timer.wrap(memory_files.write)
+    orders.write_to_file = sink_timer.wrap(memory_files.write)
+    charts.write_to_file = sink_timer.wrap(memory_files.write)
+    orders.read_from_file = memory_files.read
+    charts.read_from_file = memory_files.read
+    # Covers the OBS request each color change sends
+    account_details.set_source_color = sink_timer.wrap(account_details.set_source_color)
+
+
+def reset_state(memory_files):
+    """Clear everything a previous frame left behind, so each frame is scored on its own."""
+    memory_files.files.clear()
+    orders.last_order = None
+    charts.last_ticker = None
+    for field in ACCOUNT_FIELDS:
+        if field in ('openPL', 'daysPL'):
+            account_details.global_account_details[field].update(amount=None, percentage=None)
+        else:
+            account_details.global_account_details[field] = None
+
+
+def score_frame(labels, memory_files, accuracy):
+    def record(key, expected, actual):
+        counts = accuracy.setdefault(key, {'correct': 0, 'total': 0})
+        counts['total'] += 1
+        counts['correct'] += int(expected == actual)
+
+    details = account_details.global_account_details
+    for field, expected in labels.get('account', {}).items():
+        if isinstance(expected, dict):
+            actual = {key: details[field].get(key) for key in expected}
+        else:
+            actual = details.get(field)
+        record('account', expected, actual)
+
+    if 'orders' in labels:
+        lines = memory_files.read(orders.activity_file).strip().split('\n')
+        actual = lines[-1].split('} ', 1)[-1] if lines and lines[-1] else None
+        record('orders', labels['orders'], actual)
+
+    if 'chart' in labels:
+        record('chart', labels['chart'], memory_files.read(charts.chart_file).strip() or None)
+
+
+def percentiles(samples):
+    if not samples:
+        return {}
+    values = np.array(samples) * 1000
+    return {
+        'count': len(samples),
+        'mean_ms': round(float(values.mean()), 3),
+        'p50_ms': round(float(np.percentile(values, 50)), 3),
+        'p90_ms': round(float(np.percentile(values, 90)), 3),
+        'p99_ms': round(float(np.percentile(values, 99)), 3),
+        'max_ms': round(float(values.max()), 3),
+    }
+
+
+def peak_rss_mb():
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports kilobytes, macOS bytes
+        return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+    except ImportError:
+        import psutil
+        return round(psutil.Process().memory_info().peak_wset / (1024 * 1024), 1)
+
+
+def run(corpus, warm_cache=False, glyph=False, limit=None):
+    with open(os.path.join(corpus, 'labels.json'), 'r') as f:
+        labels = json.load(f)
+
+    handlers = {
+        'account': account_details.process_account,
+        'orders': orders.process_orders,
+        'chart': charts.process_chart,
+    }
+    registry = RegionRegistry(handlers)
+    recognizers = {
+        name: GlyphRecognizer() for name, region in registry.regions().items()
+        if glyph and region.fast_path == 'glyph'
+    }
+
+    obs_client = StubObsClient()
+    memory_files = MemoryFiles()
+    sink_timer = SinkTimer()
+    install_stubs(memory_files, sink_timer)
+
+    source = ImageDirectorySource(corpus)
+    capturer = FrameCapturer(source=source)
+    timings = {stage: [] for stage in STAGES}
+    accuracy = {}
+    frames = 0
+
+    wall_start = time.perf_counter()
+    while limit is None or frames < limit:
+        start = time.perf_counter()
+        regions = capturer.capture_regions(registry.rects())
+        if regions is None:
+            break
+        timings['capture'].append(time.perf_counter() - start)
+        frame_name = os.path.basename(source.paths[source.index - 1])
+        reset_state(memory_files)
+        if not warm_cache:
+            ocr.ocr_cache.clear()
+
+        for name, crop in regions.items():
+            region = registry.get(name)
+
+            start = time.perf_counter()
+            image = preprocessor.run(crop, region.profile, region=name)
+            timings['preprocess'].append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            # Already preprocessed above, hence no profile
+            _, text = next(ocr.recognize_regions({name: (image, None, region.ocr_config)}, recognizers=recognizers))
+            timings['ocr'].append(time.perf_counter() - start)
+
+            sink_timer.seconds = 0.0
+            start = time.perf_counter()
+            if region.handler is account_details.process_account:
+                region.handler(crop, obs_client=obs_client, extracted_text=text)
+            else:
+                region.handler(crop, extracted_text=text)
+            handler_seconds = time.perf_counter() - start
+            timings['sink'].append(sink_timer.seconds)
+            timings['parse'].append(handler_seconds - sink_timer.seconds)
+
+        score_frame(labels.get(frame_name, {}), memory_files, accuracy)
+        frames += 1
+    wall_seconds = time.perf_counter() - wall_start
+
+    correct = sum(counts['correct'] for counts in accuracy.values())
+    total = sum(counts['total'] for counts in accuracy.values())
+    for counts in accuracy.values():
+        counts['ratio'] = round(counts['correct'] / counts['total'], 4)
+    accuracy['overall'] = {'correct': correct, 'total': total, 'ratio': round(correct / total, 4) if total else None}
+
+    return {
+        'corpus': os.path.abspath(corpus),
+        'frames': frames,
+        'warm_cache': warm_cache,
+        'glyph_fast_path': glyph,
+        'throughput_fps': round(frames / wall_seconds, 3) if wall_seconds else None,
+        'peak_rss_mb': peak_rss_mb(),
+        'obs_requests': obs_client.requests,
+        'stages': {stage: percentiles(samples) for stage, samples in timings.items()},
+        'ocr_cache': ocr.ocr_cache.get_stats(),
+        'accuracy': accuracy,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('corpus', help="Directory of frames with a labels.json")
+    parser.add_argument('--warm-cache', action='store_true', help="Keep OCR cache entries across frames")
+    parser.add_argument('--glyph', action='store_true', help="Enable the glyph fast path where regions.json asks for it")
+    parser.add_argument('--limit', type=int, help="Stop after this many frames")
+    parser.add_argument('--output', help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    report = json.dumps(run(args.corpus, args.warm_cache, args.glyph, args.limit), indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(report + '\n')
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 # run.py
-from app.main import main
-
+# The import stays under the guard: spawned OCR workers re-run this file as their
+# __main__, and they must not pull in the whole app (config, OBS, Flask, bots).
 if __name__ == '__main__' or __name__ == 'run':
+    from app.main import main
     main()
-
@@ -0,0 +1,107 @@
+import os
+import sys
+import time
+import unittest
+from unittest import mock
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+sys.path.append(project_root)
+
+from app.utils import metrics
+from app.utils.metrics import MetricsRegistry
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+        self.histogram = self.registry.histogram('stage_seconds', "Stage time", ('stage', 'region'), buckets=(0.01, 0.1))
+        self.counter = self.registry.counter('events_total', "Events", ('region',))
+
+    def test_histogram_buckets_and_totals(self):
+        self.histogram.observe(0.005, stage='ocr', region='account')
+        self.histogram.observe(0.05, stage='ocr', region='account')
+        self.histogram.observe(2.0, stage='ocr', region='account')
+
+        counts, total, count = self.histogram.snapshot(stage='ocr', region='account')
+        self.assertEqual(counts, [1, 1, 1])
+        self.assertAlmostEqual(total, 2.055)
+        self.assertEqual(count, 3)
+        self.assertIsNone(self.histogram.snapshot(stage='ocr', region='orders'))
+
+    def test_render_is_cumulative_prometheus_text(self):
+        self.histogram.observe(0.005, stage='ocr', region='account')
+        self.histogram.observe(0.05, stage='ocr', region='account')
+        self.counter.inc(region='orders')
+        self.counter.inc(2, region='orders')
+
+        text = self.registry.render()
+        self.assertIn('# TYPE stage_seconds histogram', text)
+        self.assertIn('stage_seconds_bucket{stage="ocr",region="account",le="0.01"} 1', text)
+        self.assertIn('stage_seconds_bucket{stage="ocr",region="account",le="0.1"} 2', text)
+        self.assertIn('stage_seconds_bucket{stage="ocr",region="account",le="+Inf"} 2', text)
+        self.assertIn('stage_seconds_count{stage="ocr",region="account"} 2', text)
+        self.assertIn('events_total{region="orders"} 3', text)
+
+    def test_disabled_metrics_record_nothing(self):
+        metrics.enabled = False
+        try:
+            self.histogram.observe(0.005, stage='ocr', region='account')
+            self.counter.inc(region='orders')
+        finally:
+            metrics.enabled = True
+        self.assertIsNone(self.histogram.snapshot(stage='ocr', region='account'))
+        self.assertEqual(self.counter.value(region='orders'), 0)
+
+    def test_reregistering_returns_existing_metric(self):
+        self.assertIs(self.registry.counter('events_total', "Events", ('region',)), self.counter)
+        with self.assertRaises(ValueError):
+            self.registry.histogram('events_total', "Events", ('region',))
+
+    def test_gauge_goes_up_and_down(self):
+        gauge = self.registry.gauge('queue_depth', "Queued requests", ('queue',))
+        gauge.set(5, queue='outbound')
+        gauge.set(2, queue='outbound')
+        self.assertEqual(gauge.value(queue='outbound'), 2)
+        text = self.registry.render()
+        self.assertIn('# TYPE queue_depth gauge', text)
+        self.assertIn('queue_depth{queue="outbound"} 2', text)
+
+
+class TestSummary(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+        self.summary = self.registry.summary('latency_seconds', "Latency", ('sink',), window=100)
+
+    def test_overlay_latency_needs_a_capture_time(self):
+        with mock.patch.object(metrics, 'capture_to_overlay', self.summary):
+            metrics.observe_overlay_latency(None, 'obs')
+            metrics.observe_overlay_latency(time.time() - 0.05, 'obs')
+        self.assertEqual(self.summary.snapshot()[('obs',)]['count'], 1)
+
+    def test_quantiles_over_window(self):
+        for ms in range(1, 201):
+            self.summary.observe(ms / 1000, sink='obs')
+
+        # Only the latest 100 observations (101..200 ms) count
+        quantiles = self.summary.quantiles(sink='obs')
+        self.assertAlmostEqual(quantiles[0.5], 0.151)
+        self.assertAlmostEqual(quantiles[0.99], 0.2)
+        self.assertEqual(self.summary.quantiles(sink='file'), {})
+
+        text = self.registry.render()
+        self.assertIn('latency_seconds{sink="obs",quantile="0.5"} 0.151', text)
+        self.assertIn('latency_seconds_count{sink="obs"} 200', text)
+
+    def test_latency_report_in_milliseconds(self):
+        self.summary.observe(0.120, sink='obs')
+        self.summary.observe(0.080, sink='obs')
+
+        report = metrics.latency_report(self.summary)['obs']
+        self.assertEqual(report['count'], 2)
+        self.assertEqual(report['p50_ms'], 120.0)
+        self.assertEqual(report['p99_ms'], 120.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,567 @@
+import os
+import sys
+import json
+import socket
+import asyncio
+import threading
+import unittest
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+sys.path.append(project_root)
+
+import websockets
+from app.obs.async_obs_client import AsyncObsClient, backoff_delay, replay_key, obs_coalesced, obs_queue_depth
+from app.obs.event_bus import EventBus, EventSubscription
+from app.obs.obs_client import ObsClient, RequestBatch
+from app.obs.state_cache import STATUS_REQUESTS
+from app.obs import obs_operations
+
+
+class FakeObsServer:
+    """
+    A local obs-websocket stand-in on its own thread and event loop. It identifies
+    clients, answers requests like OBS would (`fail` lists request types that report
+    failure; answers to `hold` types are kept back until `release_held`; `responses`
+    gives fixed response data per request type, the rest echo their request data),
+    and can `emit` events.
+    """
+
+    def __init__(self, fail=(), hold=(), responses=None, port=0):
+        self.fail = set(fail)
+        self.port = port
+        self.hold = set(hold)
+        self.responses = dict(responses or {})
+        self.held = []
+        self.sent = []
+        self.identify = []
+        self.connections = set()
+        self.loop = asyncio.new_event_loop()
+        started = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(started,), daemon=True)
+        self.thread.start()
+        started.wait(timeout=5)
+
+    def _run(self, started):
+        asyncio.set_event_loop(self.loop)
+        self.server = self.loop.run_until_complete(self._serve())
+        self.url = f"ws://127.0.0.1:{self.server.sockets[0].getsockname()[1]}"
+        started.set()
+        self.loop.run_forever()
+
+    async def _serve(self):
+        return await websockets.serve(self._handle, "127.0.0.1", self.port)
+
+    def _call(self, func, *args):
+        asyncio.run_coroutine_threadsafe(func(*args), self.loop).result(timeout=5)
+
+    def _result(self, request):
+        ok = request['requestType'] not in self.fail
+        return {
+            "requestType": request['requestType'],
+            "requestId": request['requestId'],
+            "requestStatus": {"result": ok, "code": 100 if ok else 600},
+            "responseData": self.responses.get(request['requestType'], {"echo": request.get('requestData', {})}),
+        }
+
+    async def _handle(self, ws):
+        await ws.send(json.dumps({"op": 0, "d": {"obsWebSocketVersion": "5.0.0", "rpcVersion": 1}}))
+        identify = json.loads(await ws.recv())
+        self.identify.append(identify)
+        await ws.send(json.dumps({"op": 2, "d": {"negotiatedRpcVersion": 1}}))
+        self.connections.add(ws)
+        try:
+            async for message in ws:
+                data = json.loads(message)
+                d = data['d']
+                if data['op'] == 3:  # Reidentify
+                    self.identify.append(data)
+                    await ws.send(json.dumps({"op": 2, "d": {"negotiatedRpcVersion": 1}}))
+                    continue
+                self.sent.append(data)
+                if data['op'] == 6:
+                    reply = {"op": 7, "d": self._result(d)}
+                    if d['requestType'] in self.hold:
+                        self.held.append((ws, reply))
+                        continue
+                elif data['op'] == 8:
+                    results = []
+                    for request in d['requests']:
+                        results.append(self._result(request))
+                        if d.get('haltOnFailure') and not results[-1]['requestStatus']['result']:
+                            break
+                    reply = {"op": 9, "d": {"requestId": d['requestId'], "results": results}}
+                else:
+                    continue
+                await ws.send(json.dumps(reply))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self.connections.discard(ws)
+
+    def release_held(self):
+        async def release():
+            held, self.held = self.held, []
+            for ws, reply in held:
+                await ws.send(json.dumps(reply))
+        self._call(release)
+
+    def emit(self, event_type, event_data=None):
+        async def emit():
+            message = json.dumps({"op": 5, "d": {"eventType": event_type, "eventIntent": 1, "eventData": event_data or {}}})
+            for ws in list(self.connections):
+                await ws.send(message)
+        self._call(emit)
+
+    def drop(self):
+        """Close every client connection, as an OBS restart would; new connections are still accepted."""
+        async def drop():
+            for ws in list(self.connections):
+                await ws.close()
+        self._call(drop)
+
+    def close(self):
+        async def close():
+            self.server.close()
+            await self.server.wait_closed()
+        self._call(close)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=5)
+        self.loop.close()
+
+
+def wait_until(predicate, timeout=2):
+    deadline = threading.Event()
+    for _ in range(int(timeout / 0.01)):
+        if predicate():
+            return True
+        deadline.wait(0.01)
+    return predicate()
+
+
+def connected_client(server, **kwargs):
+    client = ObsClient(host=server.url, **kwargs)
+    ready = threading.Event()
+    client.on_ready_callback = ready.set
+    client.start_connection()
+    ready.wait(timeout=2)
+    # Leave out the status cache's queries at connect
+    wait_until(lambda: len(server.sent) >= len(STATUS_REQUESTS))
+    server.sent.clear()
+    return client
+
+
+class TestAsyncObsClient(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeObsServer(fail={"BadRequest"})
+        self.addCleanup(self.server.close)
+
+    def test_identify_request_and_events(self):
+        async def scenario():
+            client = AsyncObsClient(self.server.url, event_subscriptions=64)
+            self.assertTrue(await client.connect())
+            self.assertEqual(await client.request("GetVersion", {"a": 1}), {"echo": {"a": 1}})
+            self.assertIsNone(await client.request("BadRequest"))
+            self.assertEqual(
+                await client.request_batch([("GetVersion", None), ("BadRequest", None)]),
+                [{"echo": {}}, None]
+            )
+
+            events = client.events()
+            waiting = asyncio.ensure_future(events.__anext__())
+            await asyncio.sleep(0.05)
+            await asyncio.get_running_loop().run_in_executor(None, self.server.emit, "RecordStateChanged", {"outputActive": True})
+            event = await asyncio.wait_for(waiting, timeout=2)
+            await events.aclose()
+            await client.close()
+            return event
+
+        event = asyncio.run(scenario())
+        self.assertEqual(self.server.identify[0]['d']['eventSubscriptions'], 64)
+        self.assertEqual(event['eventType'], "RecordStateChanged")
+        self.assertEqual(event['eventData'], {"outputActive": True})
+
+    def test_connect_keeps_trying_after_failed_attempts(self):
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+        results = []
+
+        async def scenario():
+            client = AsyncObsClient(f"ws://127.0.0.1:{port}", reconnect_delay=0.05, max_reconnect_delay=0.1)
+            connected = asyncio.Event()
+            client.connection_callbacks.append(lambda up: up and connected.set())
+            self.assertFalse(await client.connect(retry_attempts=2, retry_delay=0))
+
+            # Held until OBS shows up, then sent
+            client.enqueue("SetInputSettings", {"inputName": "Chart Title", "inputSettings": {"text": "SPY"}}, results.append)
+            server = await asyncio.get_running_loop().run_in_executor(None, lambda: FakeObsServer(port=port))
+            self.addCleanup(server.close)
+            await asyncio.wait_for(connected.wait(), timeout=5)
+            await asyncio.sleep(0.1)
+            await client.close()
+            self.assertIsNone(client._reconnect_task)
+
+        asyncio.run(scenario())
+        self.assertEqual(results, [{"echo": {"inputName": "Chart Title", "inputSettings": {"text": "SPY"}}}])
+
+    def test_close_stops_retrying(self):
+        async def scenario():
+            client = AsyncObsClient("ws://127.0.0.1:9", reconnect_delay=0.05)
+            self.assertFalse(await client.connect(retry_attempts=1, retry_delay=0))
+            task = client._reconnect_task
+            await client.close()
+            await asyncio.sleep(0)
+            return task
+
+        self.assertTrue(asyncio.run(scenario()).cancelled())
+
+    def test_request_without_connection_raises(self):
+        async def scenario():
+            await AsyncObsClient(self.server.url).request("GetVersion")
+
+        with self.assertRaises(ConnectionError):
+            asyncio.run(scenario())
+
+
+class TestRequestBatch(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeObsServer(fail={"BadRequest"})
+        self.addCleanup(self.server.close)
+        self.client = connected_client(self.server)
+        self.addCleanup(self.client.disconnect)
+
+    def test_batch_is_one_message_with_ordered_results(self):
+        seen = []
+        with self.client.batch(RequestBatch.PARALLEL) as batch:
+            batch.send_request("SetInputSettings", {"inputName": "Profit Overlay"}, callback=seen.append)
+            batch.send_request("BadRequest")
+            batch.send_request("SetInputSettings", {"inputName": "Profit Overlay 2"})
+
+        results = batch.future.result(timeout=2)
+        self.assertEqual(len(self.server.sent), 1)
+        self.assertEqual(self.server.sent[0]['op'], 8)
+        self.assertEqual(self.server.sent[0]['d']['executionType'], RequestBatch.PARALLEL)
+        self.assertEqual(results[0], {"echo": {"inputName": "Profit Overlay"}})
+        self.assertIsNone(results[1])
+        self.assertEqual(results[2], {"echo": {"inputName": "Profit Overlay 2"}})
+        self.assertEqual(seen, [results[0]])
+
+    def test_halt_on_failure_leaves_later_results_empty(self):
+        with self.client.batch(halt_on_failure=True) as batch:
+            batch.send_request("BadRequest")
+            batch.send_request("CallVendorRequest")
+
+        self.assertEqual(batch.future.result(timeout=2), [None, None])
+        self.assertTrue(self.server.sent[0]['d']['haltOnFailure'])
+
+    def test_failures_report_what_obs_answered(self):
+        errors = []
+        answered = threading.Event()
+        self.client.send_request("BadRequest", callback=lambda result: answered.set(), on_error=errors.append)
+        self.assertTrue(answered.wait(timeout=2))
+
+        # The halted request never ran, so OBS has no status for it
+        with self.client.batch(halt_on_failure=True) as batch:
+            batch.send_request("BadRequest", on_error=errors.append)
+            batch.send_request("CallVendorRequest", on_error=errors.append)
+        batch.future.result(timeout=2)
+        self.assertEqual([status and status['code'] for status in errors], [600, 600, None])
+
+    def test_empty_batch_sends_nothing(self):
+        with self.client.batch() as batch:
+            pass
+        self.assertEqual(batch.future.result(timeout=1), [])
+        self.assertEqual(self.server.sent, [])
+
+
+class TestPendingRequests(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeObsServer(fail={"BadRequest"}, hold={"SlowRequest"})
+        self.addCleanup(self.server.close)
+        self.client = connected_client(self.server)
+        self.addCleanup(self.client.disconnect)
+
+    def test_request_ids_are_unique(self):
+        first = self.client.request_future("GetRecordStatus")
+        second = self.client.request_future("GetRecordStatus")
+        self.assertEqual(first.result(timeout=1), {"echo": {}})
+        self.assertEqual(second.result(timeout=1), {"echo": {}})
+        ids = [message['d']['requestId'] for message in self.server.sent]
+        self.assertEqual(len(set(ids)), 2)
+
+    def test_sync_request_results(self):
+        self.assertEqual(self.client._send_request_internal("GetStreamStatus", {"a": 1}), {"echo": {"a": 1}})
+        self.assertIsNone(self.client._send_request_internal("BadRequest"))
+        self.assertEqual(self.client.pending, {})
+
+    def test_timeout_fails_and_late_response_is_dropped(self):
+        future = self.client.request_future("SlowRequest", timeout=0.05)
+        with self.assertRaises(TimeoutError):
+            future.result(timeout=1)
+        self.assertEqual(self.client.pending, {})
+
+        # The late answer has nobody to go to and doesn't linger
+        self.server.release_held()
+        self.assertEqual(self.client._send_request_internal("GetVersion"), {"echo": {}})
+        self.assertEqual(self.client.pending, {})
+
+    def test_cancel_withdraws_pending_request(self):
+        future = self.client.request_future("SlowRequest")
+        self.assertTrue(wait_until(lambda: len(self.client.pending) == 1))
+        self.assertTrue(future.cancel())
+        self.assertTrue(wait_until(lambda: self.client.pending == {}))
+
+    def test_disconnect_fails_pending_requests(self):
+        future = self.client.request_future("SlowRequest")
+        self.client.disconnect()
+        with self.assertRaises(ConnectionError):
+            future.result(timeout=1)
+
+    def test_disconnect_stops_the_loop_and_workers(self):
+        self.client.disconnect()
+        self.assertFalse(self.client.loop_thread.is_alive())
+        self.assertTrue(self.client.loop.is_closed())
+        with self.assertRaises(RuntimeError):
+            self.client._callbacks.submit(print)
+        with self.assertRaises(RuntimeError):
+            self.client.events._executor.submit(print)
+        # A second disconnect is harmless
+        self.client.disconnect()
+
+
+class TestPipelining(unittest.TestCase):
+    def test_slow_request_does_not_hold_up_the_queue(self):
+        ws = FakeObsServer(hold={"SlowRequest"})
+        self.addCleanup(ws.close)
+        client = connected_client(ws)
+        self.addCleanup(client.disconnect)
+
+        slow_done = threading.Event()
+        fast_done = threading.Event()
+        client.send_request("SlowRequest", callback=lambda _: slow_done.set())
+        client.send_request("SetInputSettings", callback=lambda _: fast_done.set())
+
+        self.assertTrue(fast_done.wait(timeout=1))
+        self.assertFalse(slow_done.is_set())
+        ws.release_held()
+        self.assertTrue(slow_done.wait(timeout=1))
+
+    def test_window_limits_requests_in_flight(self):
+        ws = FakeObsServer(hold={"SlowRequest"})
+        self.addCleanup(ws.close)
+        client = connected_client(ws, max_in_flight=2)
+        self.addCleanup(client.disconnect)
+
+        done = threading.Event()
+        for _ in range(3):
+            client.send_request("SlowRequest")
+        client.send_request("SetInputSettings", callback=lambda _: done.set())
+
+        # Two slow requests fill the window; the rest wait their turn
+        self.assertFalse(done.wait(timeout=0.3))
+        self.assertEqual(len(ws.sent), 2)
+        ws.release_held()
+        self.assertTrue(done.wait(timeout=1))
+        self.assertEqual(len(ws.sent), 4)
+
+
+class TestCoalescing(unittest.TestCase):
+    def test_queued_updates_for_the_same_setting_collapse_to_the_latest(self):
+        server = FakeObsServer(hold={"GetSceneList"})
+        self.addCleanup(server.close)
+        client = connected_client(server, max_in_flight=1)
+        self.addCleanup(client.disconnect)
+        coalesced_before = obs_coalesced.value(queue='outbound')
+
+        # Fill the window so everything after it stays queued
+        client.send_request("GetSceneList")
+        self.assertTrue(wait_until(lambda: len(server.sent) == 1))
+
+        results = []
+        for color in (1, 2, 3):
+            client.send_request("SetInputSettings", {"inputName": "Profit Overlay", "inputSettings": {"color": color}},
+                                callback=lambda r, color=color: results.append((color, r)))
+        # Different setting keys and inputs are separate entries
+        client.send_request("SetInputSettings", {"inputName": "Profit Overlay", "inputSettings": {"text": "$5"}})
+        client.send_request("SetInputSettings", {"inputName": "Profit Overlay 2", "inputSettings": {"color": 9}})
+        client.send_request("GetVersion")
+        self.assertTrue(wait_until(lambda: obs_queue_depth.value(queue='outbound') == 4))
+        self.assertEqual(obs_coalesced.value(queue='outbound') - coalesced_before, 2)
+
+        server.release_held()
+        self.assertTrue(wait_until(lambda: len(results) == 3 and len(server.sent) == 5))
+        server.release_held()
+        sent = [(m['d']['requestType'], m['d']['requestData']) for m in server.sent[1:]]
+        self.assertEqual(sent, [
+            ("SetInputSettings", {"inputName": "Profit Overlay", "inputSettings": {"color": 3}}),
+            ("SetInputSettings", {"inputName": "Profit Overlay", "inputSettings": {"text": "$5"}}),
+            ("SetInputSettings", {"inputName": "Profit Overlay 2", "inputSettings": {"color": 9}}),
+            ("GetVersion", {}),
+        ])
+        latest = {"echo": {"inputName": "Profit Overlay", "inputSettings": {"color": 3}}}
+        self.assertEqual(sorted(results, key=lambda r: r[0]), [(1, latest), (2, latest), (3, latest)])
+        self.assertEqual(obs_queue_depth.value(queue='outbound'), 0)
+
+
+class TestReconnect(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeObsServer(fail={"BadRequest"})
+        self.addCleanup(self.server.close)
+        self.client = connected_client(self.server)
+        self.client.async_client.reconnect_delay = 0.05
+        self.addCleanup(self.client.disconnect)
+
+    def settings(self, text):
+        return {"inputName": "Profit Overlay", "inputSettings": {"text": text}}
+
+    def test_reconnects_and_replays_latest_idempotent_requests(self):
+        # Long enough for all three requests to be queued while disconnected
+        self.client.async_client.reconnect_delay = 0.4
+        self.server.drop()
+        self.assertTrue(wait_until(lambda: not self.client.ready.is_set()))
+
+        results = []
+        self.client.send_request("SetInputSettings", self.settings("$1"), callback=lambda r: results.append(("$1", r)))
+        self.client.send_request("SetInputSettings", self.settings("$2"), callback=lambda r: results.append(("$2", r)))
+        self.client.send_request("StartRecord", callback=lambda r: results.append(("start", r)))
+
+        self.assertTrue(wait_until(lambda: self.client.ready.is_set()))
+        self.assertTrue(wait_until(lambda: len(results) == 3))
+        self.assertEqual(len(self.server.identify), 2)
+        # The non-idempotent request fails; only the latest text is sent, and answers both updates
+        self.assertEqual(results[0], ("start", None))
+        self.assertEqual(results[1:], [("$1", {"echo": self.settings("$2")}), ("$2", {"echo": self.settings("$2")})])
+        updates = [m['d']['requestData'] for m in self.server.sent if m['d']['requestType'] == "SetInputSettings"]
+        self.assertEqual(updates, [self.settings("$2")])
+
+    def test_requests_work_after_reconnect(self):
+        self.server.drop()
+        self.assertTrue(wait_until(lambda: not self.client.connected))
+        self.assertTrue(wait_until(lambda: self.client.connected))
+        self.assertEqual(self.client._send_request_internal("GetVersion"), {"echo": {}})
+
+    def test_replay_buffer_is_bounded(self):
+        self.client.async_client.max_buffered = 2
+        self.server.drop()
+        self.assertTrue(wait_until(lambda: not self.client.connected))
+
+        results = []
+        for name in ("A", "B", "C"):
+            self.client.send_request("SetInputSettings", {"inputName": name, "inputSettings": {"text": name}},
+                                     callback=lambda result, name=name: results.append((name, result)))
+        self.assertTrue(wait_until(lambda: len(results) == 3))
+        self.assertEqual(results[0], ("A", None))
+        self.assertEqual(sorted(name for name, result in results[1:] if result), ["B", "C"])
+
+    def test_replay_key_and_backoff(self):
+        self.assertEqual(
+            replay_key("SetInputSettings", {"inputName": "Profit Overlay", "inputSettings": {"text": "", "color": 1}}),
+            ("SetInputSettings", "Profit Overlay", ("color", "text"))
+        )
+        self.assertIsNone(replay_key("StartRecord", None))
+        for attempt in range(10):
+            delay = backoff_delay(attempt, base=0.5, cap=30.0)
+            expected = min(30.0, 0.5 * 2 ** attempt)
+            self.assertTrue(expected / 2 <= delay <= expected)
+        # Hours of failed reconnects stay at the cap instead of overflowing
+        self.assertTrue(15.0 <= backoff_delay(5000, base=0.5, cap=30.0) <= 30.0)
+
+
+class TestEventBus(unittest.TestCase):
+    def test_mask_follows_registered_handlers(self):
+        changes = []
+        bus = EventBus(on_mask_changed=changes.append)
+        self.addCleanup(bus.shutdown)
+        handler = bus.subscribe("RecordStateChanged", lambda event: None)
+        bus.subscribe("StreamStateChanged", lambda event: None)
+        bus.subscribe("VendorEvent", lambda event: None)
+        self.assertEqual(bus.mask, EventSubscription.OUTPUTS | EventSubscription.VENDORS)
+
+        bus.unsubscribe("RecordStateChanged", handler)
+        self.assertEqual(bus.mask, EventSubscription.OUTPUTS | EventSubscription.VENDORS)
+        # Only actual changes are reported
+        self.assertEqual(changes, [EventSubscription.OUTPUTS, EventSubscription.OUTPUTS | EventSubscription.VENDORS])
+        with self.assertRaises(ValueError):
+            bus.subscribe("RecordingStarted", lambda event: None)
+
+    def test_full_bus_drops_events(self):
+        bus = EventBus(max_pending=1)
+        self.addCleanup(bus.shutdown)
+        release = threading.Event()
+        seen = []
+
+        def handler(event):
+            release.wait(timeout=2)
+            seen.append(event.data['n'])
+
+        bus.subscribe("ReplayBufferSaved", handler)
+        for n in range(3):
+            bus.dispatch({"eventType": "ReplayBufferSaved", "eventData": {"n": n}})
+        release.set()
+        self.assertTrue(wait_until(lambda: seen == [0]))
+
+    def test_client_reidentifies_and_delivers_events(self):
+        server = FakeObsServer()
+        self.addCleanup(server.close)
+        client = connected_client(server)
+        self.addCleanup(client.disconnect)
+        # The status cache's handlers are registered from the start
+        base = EventSubscription.OUTPUTS | EventSubscription.VENDORS
+        self.assertEqual(server.identify[0]['d']['eventSubscriptions'], base)
+
+        received = []
+        client.events.subscribe("CurrentProgramSceneChanged", lambda event: received.append((event, threading.current_thread())))
+        self.assertTrue(wait_until(lambda: len(server.identify) == 2))
+        self.assertEqual(server.identify[1], {"op": 3, "d": {"eventSubscriptions": base | EventSubscription.SCENES}})
+
+        server.emit("SceneListChanged", {"scenes": []})
+        server.emit("CurrentProgramSceneChanged", {"sceneName": "Trading"})
+        self.assertTrue(wait_until(lambda: received))
+        event, thread = received[0]
+        self.assertEqual(event.type, "CurrentProgramSceneChanged")
+        self.assertEqual(event.data, {"sceneName": "Trading"})
+        self.assertIsNot(thread, client.loop_thread)
+        self.assertEqual(len(received), 1)
+
+
+class TestStateCache(unittest.TestCase):
+    RECORD_STATUS = {"outputActive": False, "outputPaused": False, "outputDuration": 0}
+    STREAM_STATUS = {"outputActive": True, "outputReconnecting": False, "outputDuration": 5000}
+
+    def setUp(self):
+        self.server = FakeObsServer(responses={"GetRecordStatus": self.RECORD_STATUS, "GetStreamStatus": self.STREAM_STATUS})
+        self.addCleanup(self.server.close)
+        self.client = connected_client(self.server)
+        self.addCleanup(self.client.disconnect)
+
+    def test_seeded_at_connect_and_read_without_requests(self):
+        self.assertTrue(wait_until(lambda: obs_operations.get_recording_status(self.client) == self.RECORD_STATUS))
+        self.assertEqual(obs_operations.get_streaming_status(self.client), self.STREAM_STATUS)
+        self.assertEqual(self.server.sent, [])
+
+    def test_events_update_status(self):
+        self.assertTrue(wait_until(lambda: self.client.state.get('record')))
+        self.server.emit("RecordStateChanged", {"outputActive": True, "outputState": "OBS_WEBSOCKET_OUTPUT_STARTED"})
+        self.server.emit("RecordStateChanged", {"outputActive": True, "outputState": "OBS_WEBSOCKET_OUTPUT_PAUSED"})
+        self.assertTrue(wait_until(lambda: self.client.state.get('record').get('outputPaused')))
+        status = obs_operations.get_recording_status(self.client)
+        self.assertTrue(status['outputActive'])
+        self.assertEqual(status['outputDuration'], 0)
+        self.assertEqual(self.server.sent, [])
+
+    def test_vertical_canvas_vendor_events(self):
+        self.assertEqual(self.client.state.get('vertical_backtrack'), {})
+        self.server.emit("VendorEvent", {"vendorName": "aitum-vertical-canvas", "eventType": "backtrack_started", "eventData": {}})
+        self.server.emit("VendorEvent", {"vendorName": "some-other-plugin", "eventType": "backtrack_stopped", "eventData": {}})
+        self.assertTrue(wait_until(lambda: self.client.state.get('vertical_backtrack') == {"outputActive": True}))
+
+    def test_expired_entry_is_refetched_in_background(self):
+        self.assertTrue(wait_until(lambda: self.client.state.get('stream')))
+        self.client.state.ttl = 0
+        self.assertEqual(self.client.state.get('stream'), self.STREAM_STATUS)
+        self.assertTrue(wait_until(lambda: [m['d']['requestType'] for m in self.server.sent] == ["GetStreamStatus"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
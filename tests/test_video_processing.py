@@ -0,0 +1,593 @@
+import os
+import sys
+import json
+import subprocess
+import tempfile
+import time
+import unittest
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+sys.path.append(project_root)
+
+from app.video_processing.change_detection import RegionChangeDetector
+from app.video_processing.ocr_cache import OcrCache
+from app.video_processing.scheduler import RegionScheduler
+from app.video_processing.preprocessing import Preprocessor, scale_factor
+from app.video_processing.regions import RegionRegistry
+from app.video_processing.glyph_recognizer import GlyphRecognizer
+from app.video_processing.frame_ring import SharedFrameRing, attach_crop
+from app.video_processing.frame_sources import FrameSource, ImageDirectorySource
+from app.video_processing.capture import FrameCapturer
+from app.video_processing.overlay_state import OverlayState, output_sinks, obs_input_name
+from app.video_processing import ocr, ocr_executor
+from app.video_processing.ocr_executor import OcrExecutor
+from app.utils.metrics import MetricsRegistry
+
+
+class TestRegionChangeDetector(unittest.TestCase):
+    def setUp(self):
+        self.detector = RegionChangeDetector(threshold=2.0, downsample=2, refresh_interval=60)
+        self.crop = np.zeros((40, 80, 3), dtype=np.uint8)
+
+    def test_first_crop_is_processed(self):
+        self.assertTrue(self.detector.should_process('account', self.crop))
+
+    def test_unchanged_crop_is_skipped(self):
+        self.detector.should_process('account', self.crop)
+        self.assertFalse(self.detector.should_process('account', self.crop.copy()))
+        self.assertEqual(self.detector.get_stats()['account'], {'processed': 1, 'skipped': 1})
+
+    def test_changed_crop_is_processed(self):
+        self.detector.should_process('account', self.crop)
+        changed = self.crop.copy()
+        changed[:, :40] = 255
+        self.assertTrue(self.detector.should_process('account', changed))
+
+    def test_regions_are_tracked_independently(self):
+        self.detector.should_process('account', self.crop)
+        self.assertTrue(self.detector.should_process('chart', self.crop))
+
+    def test_reset_forces_processing(self):
+        self.detector.should_process('orders', self.crop)
+        self.detector.reset('orders')
+        self.assertTrue(self.detector.should_process('orders', self.crop))
+
+
+class TestOcrCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = OcrCache(max_entries=2)
+        self.image = np.zeros((20, 30), dtype=np.uint8)
+
+    def test_view_and_copy_share_a_key(self):
+        frame = np.arange(100 * 100, dtype=np.uint32).astype(np.uint8).reshape(100, 100)
+        view = frame[10:30, 20:50]
+        self.assertEqual(OcrCache.image_key(view), OcrCache.image_key(view.copy()))
+
+    def test_config_is_part_of_the_key(self):
+        self.assertNotEqual(OcrCache.image_key(self.image), OcrCache.image_key(self.image, '--psm 6'))
+
+    def test_regions_are_namespaced(self):
+        key = OcrCache.image_key(self.image)
+        self.cache.put('account', key, '1.00')
+        self.assertEqual(self.cache.get('account', key), '1.00')
+        self.assertIsNone(self.cache.get('chart', key))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        self.cache.put('account', b'a', 'A')
+        self.cache.put('account', b'b', 'B')
+        self.cache.get('account', b'a')
+        self.cache.put('account', b'c', 'C')
+        self.assertIsNone(self.cache.get('account', b'b'))
+        self.assertEqual(self.cache.get('account', b'a'), 'A')
+        self.assertEqual(self.cache.get_stats()['account']['evictions'], 1)
+
+
+class FailingExecutor:
+    """Stands in for OcrExecutor: reads every region as 'text' except those in `failing`."""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+
+    def map_regions(self, jobs, frame_ref=None, rects=None):
+        return ((region, None if region in self.failing else 'text', False) for region in jobs)
+
+
+class TestOcrFailures(unittest.TestCase):
+    def setUp(self):
+        ocr.ocr_cache.clear()
+        self.addCleanup(ocr.ocr_cache.clear)
+
+    def test_failed_region_yields_none_and_is_not_cached(self):
+        jobs = {
+            'account': (np.zeros((10, 10), dtype=np.uint8), None, ''),
+            'chart': (np.ones((10, 10), dtype=np.uint8), None, ''),
+        }
+        results = dict(ocr.recognize_regions(jobs, FailingExecutor(failing={'chart'})))
+        self.assertEqual(results, {'account': 'text', 'chart': None})
+        self.assertIsNone(ocr.ocr_cache.get('chart', ocr._cache_key(*jobs['chart'])))
+
+    def test_failed_jobs_are_yielded_per_region(self):
+        executor = OcrExecutor.__new__(OcrExecutor)
+        executor._pool = ThreadPoolExecutor(max_workers=2)
+        self.addCleanup(executor._pool.shutdown)
+        # A shared frame descriptor whose memory doesn't exist
+        missing = ('no_such_frames', 'no_such_sequences', (10, 10, 3), '|u1', 2, 0, 1, (0, 0, 5, 5))
+        results = executor.map_regions({'orders': (missing, None, ''), 'chart': (missing, None, '')})
+        self.assertEqual(sorted(results), [('chart', None, False), ('orders', None, False)])
+
+
+class TestOcrWorkerStartup(unittest.TestCase):
+    def test_worker_does_not_import_the_app(self):
+        # Replays what a spawned worker does on startup: run run.py as its __main__,
+        # then import the executor module to unpickle its jobs
+        probe = (
+            "import sys, multiprocessing.spawn as spawn\n"
+            "spawn.prepare({'init_main_from_path': sys.argv[1]})\n"
+            "import app.video_processing.ocr_executor\n"
+            "print(sorted(m for m in ('app.main', 'app.config.globals') if m in sys.modules))\n"
+        )
+        done = subprocess.run(
+            [sys.executable, '-c', probe, os.path.join(project_root, 'run.py')],
+            cwd=project_root, capture_output=True, text=True, timeout=60,
+        )
+        self.assertEqual(done.returncode, 0, done.stderr)
+        self.assertEqual(done.stdout.strip(), '[]')
+
+
+class TestOcrCacheKeys(unittest.TestCase):
+    def setUp(self):
+        ocr.ocr_cache.clear()
+        self.addCleanup(ocr.ocr_cache.clear)
+        ocr_executor.worker_cache.clear()
+        self.addCleanup(ocr_executor.worker_cache.clear)
+        # Light text on a dark panel, plus a noisy copy that binarizes to the same image
+        self.crop = np.full((30, 120, 3), 20, dtype=np.uint8)
+        self.crop[10:20, 10:110] = 220
+        noise = np.random.default_rng(0).integers(-3, 4, self.crop.shape)
+        self.noisy = np.clip(self.crop.astype(int) + noise, 0, 255).astype(np.uint8)
+
+    def test_capture_noise_still_hits_the_cache(self):
+        with mock.patch.object(ocr.ocr_engine, 'image_to_string', return_value='$1.00') as read:
+            self.assertEqual(ocr.image_to_string(self.crop, 'account', profile='orders'), '$1.00')
+            self.assertEqual(ocr.image_to_string(self.noisy, 'account', profile='orders'), '$1.00')
+        self.assertEqual(read.call_count, 1)
+
+    def test_workers_cache_on_the_preprocessed_image(self):
+        with mock.patch.object(ocr_executor, '_run_ocr', return_value='$1.00') as read:
+            self.assertEqual(ocr_executor._run_region_ocr(self.crop, 'orders', '', 'account'), ('$1.00', False))
+            self.assertEqual(ocr_executor._run_region_ocr(self.noisy, 'orders', '', 'account'), ('$1.00', True))
+        self.assertEqual(read.call_count, 1)
+
+
+class TestRegionScheduler(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = RegionScheduler()
+        self.scheduler.add_region('account', interval=0.2, max_interval=1.0)
+        self.scheduler.add_region('chart', interval=1.0, max_interval=8.0)
+
+    def test_all_regions_start_due(self):
+        self.assertEqual(set(self.scheduler.due_regions(now=0)), {'account', 'chart'})
+
+    def test_static_region_backs_off_up_to_max(self):
+        for _ in range(10):
+            self.scheduler.report('chart', changed=False, now=0)
+        self.assertEqual(self.scheduler.get_intervals()['chart'], 8.0)
+
+    def test_change_snaps_back_to_base_interval(self):
+        self.scheduler.report('chart', changed=False, now=0)
+        self.scheduler.report('chart', changed=False, now=0)
+        self.scheduler.report('chart', changed=True, now=100)
+        self.assertEqual(self.scheduler.get_intervals()['chart'], 1.0)
+        self.assertNotIn('chart', self.scheduler.due_regions(now=100.5))
+        self.assertIn('chart', self.scheduler.due_regions(now=101))
+
+    def test_boosted_region_comes_first(self):
+        self.scheduler.boost('chart', interval=0.1, duration=5, now=0)
+        self.assertEqual(self.scheduler.due_regions(now=0)[0], 'chart')
+
+    def test_nothing_to_wait_for_without_regions(self):
+        self.assertEqual(self.scheduler.time_until_next(now=0), 0.0)
+        self.scheduler.remove_region('account')
+        self.scheduler.remove_region('chart')
+        self.assertEqual(self.scheduler.due_regions(now=0), [])
+        self.assertEqual(self.scheduler.time_until_next(now=0), float('inf'))
+
+
+class TestPreprocessor(unittest.TestCase):
+    def setUp(self):
+        self.profile = {'grayscale': True, 'invert': 'auto', 'binarize': 'otsu', 'glyph_height': 10, 'target_glyph_height': 30}
+        self.preprocessor = Preprocessor(profiles={'test': self.profile})
+        self.frame = np.full((200, 300, 3), 20, dtype=np.uint8)
+        self.frame[50:60, 100:150] = 220
+
+    def test_output_is_binary_grayscale_and_upscaled(self):
+        image = self.preprocessor.run(self.frame[40:80, 90:170], 'test')
+        self.assertEqual(image.shape, (40 * 3, 80 * 3))
+        self.assertTrue(set(np.unique(image)) <= {0, 255})
+
+    def test_dark_theme_is_inverted_to_dark_text_on_light(self):
+        image = self.preprocessor.run(self.frame[40:80, 90:170], 'test')
+        self.assertEqual(image[0, 0], 255)
+        self.assertEqual(image[45, 60], 0)
+
+    def test_output_buffer_is_reused(self):
+        first = self.preprocessor.run(self.frame[40:80, 90:170], 'test')
+        second = self.preprocessor.run(self.frame[40:80, 90:170], 'test')
+        self.assertIs(first, second)
+        self.assertEqual(self.preprocessor.get_timings()['test']['calls'], 2)
+
+    def test_threads_get_their_own_buffers(self):
+        crop = self.frame[40:80, 90:170]
+        here = self.preprocessor.run(crop, 'test')
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            there = pool.submit(self.preprocessor.run, crop, 'test').result()
+        self.assertIsNot(here, there)
+        np.testing.assert_array_equal(here, there)
+
+    def test_scale_factor_rounds_to_integer(self):
+        self.assertEqual(scale_factor({'glyph_height': 14, 'target_glyph_height': 30}), 2)
+        self.assertEqual(scale_factor({}), 1)
+
+
+class TestRegionRegistry(unittest.TestCase):
+    def setUp(self):
+        self.handlers = {'account': lambda *args, **kwargs: None, 'orders': lambda *args, **kwargs: None}
+        self.config_file = tempfile.NamedTemporaryFile('w', suffix='.json', delete=False)
+        self.config_file.close()
+        self.write_config({
+            'account': {'rect': [600, 230, 1100, 1100], 'whitelist': '0123456789$,.%+-', 'interval': 0.2},
+            'orders': {'rect': [0, 100, 1920, 190], 'psm': 6},
+        })
+        self.registry = RegionRegistry(self.handlers, path=self.config_file.name)
+
+    def tearDown(self):
+        os.remove(self.config_file.name)
+
+    def write_config(self, regions, mtime=None):
+        with open(self.config_file.name, 'w') as f:
+            json.dump({'regions': regions}, f)
+        if mtime is not None:
+            os.utime(self.config_file.name, (mtime, mtime))
+
+    def test_ocr_config_from_psm_and_whitelist(self):
+        self.assertEqual(self.registry.get('orders').ocr_config, '--psm 6')
+        self.assertEqual(self.registry.get('account').ocr_config, '-c tessedit_char_whitelist=0123456789$,.%+-')
+
+    def test_handler_defaults_to_region_name(self):
+        self.assertIs(self.registry.get('account').handler, self.handlers['account'])
+
+    def test_reload_reports_changed_regions(self):
+        self.write_config({
+            'account': {'rect': [600, 230, 1100, 1000], 'whitelist': '0123456789$,.%+-', 'interval': 0.2},
+        }, mtime=os.path.getmtime(self.config_file.name) + 10)
+        self.assertEqual(self.registry.reload_if_changed(), {'account', 'orders'})
+        self.assertEqual(self.registry.rects(), {'account': (600, 230, 1100, 1000)})
+
+    def test_invalid_reload_keeps_previous_regions(self):
+        self.write_config({'account': {'rect': [10, 10, 5, 5]}}, mtime=os.path.getmtime(self.config_file.name) + 10)
+        self.assertEqual(self.registry.reload_if_changed(), set())
+        self.assertEqual(set(self.registry.regions()), {'account', 'orders'})
+
+    def test_broken_file_is_reported_once_per_change(self):
+        mtime = os.path.getmtime(self.config_file.name)
+        self.write_config({'account': {'rect': [10, 10, 5, 5]}}, mtime=mtime + 10)
+        with mock.patch('builtins.print') as printed:
+            self.registry.reload_if_changed()
+            self.registry.reload_if_changed()
+            self.assertEqual(printed.call_count, 1)
+            self.write_config({'account': {'rect': [10, 10, 4, 4]}}, mtime=mtime + 20)
+            self.registry.reload_if_changed()
+            self.assertEqual(printed.call_count, 2)
+
+
+def render_panel(lines):
+    """Dark-on-light panel of text lines, like a preprocessed account crop."""
+    image = np.full((60 * len(lines) + 20, 500), 255, dtype=np.uint8)
+    for row, line in enumerate(lines):
+        cv2.putText(image, line, (10, 50 + row * 60), cv2.FONT_HERSHEY_SIMPLEX, 1.0, 0, 2)
+    return image
+
+
+class TestGlyphRecognizer(unittest.TestCase):
+    def setUp(self):
+        self.recognizer = GlyphRecognizer()
+        self.training = ['$25,431.17', '+6,890.00 +12.50%', '-310.25 -1.20%']
+
+    def test_without_templates_falls_back(self):
+        self.assertIsNone(self.recognizer.recognize(render_panel(self.training)))
+        self.assertEqual(self.recognizer.stats['fallbacks'], 1)
+
+    def test_learns_from_known_text_and_reads_new_values(self):
+        self.assertGreater(self.recognizer.learn(render_panel(self.training), '\n'.join(self.training)), 0)
+        text = self.recognizer.recognize(render_panel(['$98,765.43', '-1,052.10 -9.87%']))
+        self.assertEqual(text, '$98,765.43\n-1,052.10 -9.87%\n')
+
+    def test_mismatched_text_is_not_learned(self):
+        self.assertEqual(self.recognizer.learn(render_panel(['$25,431.17']), '$25,431.1'), 0)
+        self.assertEqual(self.recognizer.known_characters(), set())
+
+    def test_misread_does_not_override_a_known_character(self):
+        self.recognizer.learn(render_panel(self.training), '\n'.join(self.training))
+        # Same glyph count, but Tesseract read the 3 as an 8
+        self.assertEqual(self.recognizer.learn(render_panel(['$25,431.17']), '$25,481.17'), 0)
+        self.assertEqual(self.recognizer.stats['conflicts'], 1)
+        self.assertEqual(self.recognizer.recognize(render_panel(['3.33'])), '3.33\n')
+
+
+class CountingSource(FrameSource):
+    """Frames filled with 1, 2, 3, ... so tests can tell them apart."""
+
+    def __init__(self, height=20, width=30, interval=0):
+        self.shape = (height, width, 3)
+        self.count = 0
+        # Seconds per frame, like a camera, so a capture thread doesn't run the count past 255
+        self.interval = interval
+
+    def read(self, dst=None):
+        time.sleep(self.interval)
+        self.count += 1
+        frame = dst if dst is not None and dst.shape == self.shape else np.empty(self.shape, dtype=np.uint8)
+        frame[:] = self.count
+        return True, frame
+
+
+class TestFrameSources(unittest.TestCase):
+    def test_source_must_implement_read(self):
+        with self.assertRaises(TypeError):
+            FrameSource()
+
+    def test_image_directory_is_exhausted_after_last_frame(self):
+        with tempfile.TemporaryDirectory() as path:
+            cv2.imwrite(os.path.join(path, '0001.png'), np.zeros((20, 30, 3), dtype=np.uint8))
+            source = ImageDirectorySource(path)
+
+            ok, _ = source.read()
+            self.assertTrue(ok)
+            self.assertFalse(source.exhausted)
+            self.assertEqual(source.read(), (False, None))
+            self.assertTrue(source.exhausted)
+
+            source.seek(0)
+            self.assertFalse(source.exhausted)
+
+
+class TestSharedFrameRing(unittest.TestCase):
+    def setUp(self):
+        self.ring = SharedFrameRing(slots=2, shape=(20, 30, 3))
+        self.addCleanup(self.ring.close)
+
+    def publish(self, value):
+        slot = self.ring.writable_slot()
+        self.ring.frame(slot)[:] = value
+        self.ring.publish(slot, timestamp=float(value))
+        return slot
+
+    def test_attach_crop_is_a_view_of_the_published_frame(self):
+        self.publish(7)
+        frame_ref = self.ring.acquire_latest()
+        crop = attach_crop(frame_ref.descriptor((5, 2, 15, 12)))
+        self.assertEqual(crop.shape, (10, 10, 3))
+        self.assertTrue((crop == 7).all())
+
+        # Same memory, no copy
+        frame_ref.frame[2, 5] = 99
+        self.assertEqual(crop[0, 0, 0], 99)
+
+    def test_referenced_slot_is_not_reused(self):
+        first = self.publish(1)
+        frame_ref = self.ring.acquire_latest()
+        self.publish(2)
+
+        # Slot 1 holds the newest frame and slot 0 is still referenced
+        self.assertIsNone(self.ring.writable_slot())
+        frame_ref.release()
+        self.assertEqual(self.ring.writable_slot(), first)
+
+    def test_reused_slot_is_detected_by_sequence(self):
+        self.publish(1)
+        frame_ref = self.ring.acquire_latest()
+        descriptor = frame_ref.descriptor((0, 0, 30, 20))
+        frame_ref.release()
+        self.publish(2)
+        self.publish(3)
+
+        with self.assertRaises(RuntimeError):
+            attach_crop(descriptor)
+
+
+class TestFrameCapturerRing(unittest.TestCase):
+    def test_capture_regions_reads_into_ring_and_holds_current_frame(self):
+        capturer = FrameCapturer(width=30, height=20, source=CountingSource(), shared_slots=3)
+        self.addCleanup(capturer.release)
+
+        regions = capturer.capture_regions({'a': (0, 0, 10, 10)})
+        first = capturer.current_frame
+        self.assertTrue((regions['a'] == 1).all())
+        self.assertEqual(capturer.ring.refcount(first.slot), 1)
+
+        job_ref = first.retain()
+        regions = capturer.capture_regions({'a': (0, 0, 10, 10)})
+        self.assertTrue((regions['a'] == 2).all())
+        # The previous tick's reference is dropped, the job's one remains
+        self.assertEqual(capturer.ring.refcount(first.slot), 1)
+        self.assertTrue((attach_crop(job_ref.descriptor((0, 0, 10, 10))) == 1).all())
+        job_ref.release()
+
+    def test_ring_adopts_the_source_frame_size(self):
+        # A 720p-style source behind a capturer sized for 1080p
+        capturer = FrameCapturer(width=30, height=20, source=CountingSource(height=12, width=16), shared_slots=3)
+        self.addCleanup(capturer.release)
+
+        with mock.patch('builtins.print') as log:
+            regions = capturer.capture_regions({'a': (0, 0, 10, 10)})
+            self.assertTrue((regions['a'] == 1).all())
+            regions = capturer.capture_regions({'a': (0, 0, 10, 10)})
+            self.assertTrue((regions['a'] == 2).all())
+        self.assertEqual(capturer.ring.shape, (12, 16, 3))
+        self.assertEqual(log.call_count, 1)
+
+
+class TestFrameCapturerBackground(unittest.TestCase):
+    def start(self, **kwargs):
+        capturer = FrameCapturer(width=30, height=20, source=CountingSource(interval=0.005), background=True, **kwargs)
+        self.addCleanup(capturer.release)
+        return capturer
+
+    def test_wait_for_frame_returns_only_newer_frames(self):
+        capturer = self.start()
+        frame, timestamp = capturer.wait_for_frame()
+        newer, newer_timestamp = capturer.wait_for_frame(newer_than=timestamp)
+        self.assertGreater(newer_timestamp, timestamp)
+        self.assertGreater(newer[0, 0, 0], frame[0, 0, 0])
+
+    def test_ring_frames_are_copies(self):
+        capturer = self.start(shared_slots=3)
+        frame, timestamp = capturer.wait_for_frame()
+        value = frame[0, 0, 0]
+        # Let the capture thread go round the ring a few times
+        for _ in range(5):
+            _, timestamp = capturer.wait_for_frame(newer_than=timestamp)
+        self.assertTrue((frame == value).all())
+        self.assertFalse(any(np.shares_memory(frame, capturer.ring.frame(slot)) for slot in range(3)))
+
+    def test_release_stops_the_capture_thread(self):
+        capturer = self.start()
+        self.assertIsNotNone(capturer.wait_for_frame())
+        capturer.release()
+        self.assertFalse(capturer.capture_thread.is_alive())
+        # Nothing new is published once stopped, and waiting doesn't block
+        self.assertIsNone(capturer.wait_for_frame(newer_than=capturer.latest_frame()[1], timeout=5))
+
+
+class TestOverlayState(unittest.TestCase):
+    def setUp(self):
+        self.state = OverlayState()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = os.path.join(self.tmpdir.name, 'logs', 'openPL.txt')
+
+    def read(self):
+        with open(self.path) as f:
+            return f.read()
+
+    def test_ensure_file_creates_once_and_loads_content(self):
+        self.state.ensure_file(self.path, "0.00\n")
+        self.assertEqual(self.read(), "0.00\n")
+
+        # The default is already there, so publishing it again is suppressed
+        self.assertFalse(self.state.write_text(self.path, "0.00\n"))
+        self.assertEqual(self.state.get_stats()['suppressed_writes'], 1)
+
+    def test_only_changes_are_written(self):
+        self.state.ensure_file(self.path)
+        self.assertTrue(self.state.write_text(self.path, "+12.00 +1.00%\n"))
+        self.assertFalse(self.state.write_text(self.path, "+12.00 +1.00%\n"))
+        self.assertTrue(self.state.write_text(self.path, "+13.00 +1.10%\n"))
+
+        self.assertEqual(self.read(), "+13.00 +1.10%\n")
+        self.assertEqual(self.state.read_text(self.path), "+13.00 +1.10%\n")
+        self.assertEqual(self.state.get_stats()['writes'], 2)
+        # No temp files left behind
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ['openPL.txt'])
+
+    def test_source_updates_are_suppressed_until_forgotten(self):
+        self.assertTrue(self.state.claim_source_update('Profit Overlay', {'color': 1}))
+        self.assertFalse(self.state.claim_source_update('Profit Overlay', {'color': 1}))
+        self.assertTrue(self.state.claim_source_update('Profit Overlay', {'color': 2}))
+
+        self.state.forget_source('Profit Overlay')
+        self.assertTrue(self.state.claim_source_update('Profit Overlay', {'color': 2}))
+        stats = self.state.get_stats()
+        self.assertEqual((stats['obs_requests'], stats['suppressed_obs_requests']), (3, 1))
+
+    def test_update_source_sends_text_and_color_together(self):
+        class RecordingClient:
+            def __init__(self):
+                self.requests = []
+
+            def send_request(self, request_type, request_data=None, callback=None, on_error=None):
+                self.requests.append((request_type, request_data))
+                callback(True)
+
+        client = RecordingClient()
+        settings = {'text': "+12.00 +1.00%", 'color': 4288463367}
+        self.assertTrue(self.state.update_source(client, 'Profit Overlay', settings))
+        self.assertEqual(client.requests, [
+            ("SetInputSettings", {'inputName': 'Profit Overlay', 'inputSettings': settings})
+        ])
+
+    @staticmethod
+    def failing_client(status):
+        """A client whose requests all fail; `status` is what OBS answered (None: no answer)."""
+        def send_request(request_type, request_data, callback, on_error):
+            on_error(status)
+            callback(None)
+        client = mock.Mock()
+        client.send_request.side_effect = send_request
+        return client
+
+    def test_refused_input_is_not_retried_every_tick(self):
+        client = self.failing_client({'result': False, 'code': 600, 'comment': "No source was found"})
+        settings = {'text': "$1.00"}
+        with mock.patch('builtins.print') as log:
+            self.assertTrue(self.state.update_source(client, 'Market Value', settings))
+            self.assertFalse(self.state.update_source(client, 'Market Value', settings))
+            self.assertEqual(client.send_request.call_count, 1)
+            self.assertEqual(log.call_count, 1)
+
+            # A reconnected OBS gets everything again
+            self.state.on_obs_connection(True)
+            self.assertTrue(self.state.update_source(client, 'Market Value', settings))
+
+            # And so does a refused input once the retry interval is up
+            self.state.retry_interval = 0
+            self.assertTrue(self.state.update_source(client, 'Market Value', settings))
+        self.assertEqual(client.send_request.call_count, 3)
+
+    def test_unanswered_request_is_retried_next_tick(self):
+        # Timed out, or the connection dropped: OBS never said no
+        client = self.failing_client(None)
+        settings = {'text': "+1.00 +0.10%"}
+        with mock.patch('builtins.print') as log:
+            self.assertTrue(self.state.update_source(client, 'Profit Overlay', settings))
+            self.assertTrue(self.state.update_source(client, 'Profit Overlay', settings))
+        self.assertEqual(client.send_request.call_count, 2)
+        log.assert_not_called()
+
+    def test_obs_request_is_timed_until_obs_answers(self):
+        class DeferredClient:
+            def send_request(self, request_type, request_data=None, callback=None, on_error=None):
+                self.callback = callback
+
+        histogram = MetricsRegistry().histogram('stage_seconds', "Stage time", ('stage', 'region'))
+        client = DeferredClient()
+        with mock.patch('app.video_processing.overlay_state.stage_seconds', histogram):
+            self.state.update_source(client, 'Profit Overlay', {'text': "+1.00"}, region='account')
+            self.assertIsNone(histogram.snapshot(stage='obs_request', region='account'))
+            client.callback({})
+        _, _, count = histogram.snapshot(stage='obs_request', region='account')
+        self.assertEqual(count, 1)
+
+    def test_obs_input_names_come_from_settings(self):
+        settings = mock.Mock()
+        settings.get_setting.return_value = {'orders': "Last Order", 'chart': ""}
+        self.assertEqual(obs_input_name(settings, 'orders'), "Last Order")
+        self.assertIsNone(obs_input_name(settings, 'chart'))
+        settings.get_setting.return_value = None
+        self.assertIsNone(obs_input_name(settings, 'orders'))
+
+    def test_output_sinks(self):
+        self.assertEqual(output_sinks('file'), (True, False))
+        self.assertEqual(output_sinks('obs'), (False, True))
+        self.assertEqual(output_sinks('both'), (True, True))
+        self.assertEqual(output_sinks(None), (True, False))
+
+
+if __name__ == "__main__":
+    unittest.main()